@@ -0,0 +1,213 @@
+"""
+Benchmark de ponta a ponta (upload -> OCR -> slides) contra os emuladores locais.
+
+Sobe o emulador do Mistral OCR e o das APIs Google no próprio processo, aponta os
+clientes para eles e mede cada etapa do pipeline em várias iterações: p50/p95 por
+etapa, páginas por segundo, pico de RSS e as chamadas recebidas pelos emuladores.
+A extração é medida no caminho assíncrono usado pelo servidor (aprocessar_arquivo) e,
+à parte, no síncrono (processar_arquivo).
+
+    python benchmark_pipeline.py relatorio.pdf --iterations 5 --output resultado.json
+    python benchmark_pipeline.py relatorio.pdf --baseline resultado.json --tolerance 0.2
+
+Com --baseline, termina com código 1 se alguma etapa (p95) ou o pico de RSS piorar
+mais do que a tolerância.
+"""
+import os
+
+# Configuração dos clientes precisa estar no ambiente antes de importar Config
+os.environ.setdefault("MISTRAL_SERVER_URL", "http://127.0.0.1:8091")
+os.environ.setdefault("GOOGLE_API_EMULATOR_URL", "http://127.0.0.1:8090")
+os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+os.environ.setdefault("TEMPLATE_PRESENTATION_ID", "benchmark-template-0000000000000000000000")
+os.environ.setdefault("OCR_CACHE_ENABLED", "False")
+os.environ.setdefault("SLIDES_CACHE_ENABLED", "False")
+
+import sys
+import json
+import time
+import math
+import asyncio
+import logging
+import argparse
+import resource
+import tempfile
+import threading
+from urllib.parse import urlparse
+import requests
+import uvicorn
+from fastapi import UploadFile
+from config import Config
+from extrator_dados_tecnicos import ExtratorDadosTecnicos, ler_paginas
+from pdf_processor import PDFProcessor
+from google_slides_client import GoogleSlidesClient
+from utils.upload_storage import stream_upload_to_disk
+import google_api_emulator
+import mistral_ocr_emulator
+
+logger = logging.getLogger(__name__)
+
+# "extract" mede aprocessar_arquivo, o caminho usado pelo servidor; "extract_sync" mede
+# processar_arquivo, usado pela CLI do extrator
+STAGES = ("upload", "extract", "extract_sync", "pdf_processor", "slides_from_json", "presentation_from_pdf")
+# Etapas somadas no tempo total do pipeline (o caminho do servidor)
+PIPELINE_STAGES = tuple(stage for stage in STAGES if stage != "extract_sync")
+
+
+def percentile(values, fraction):
+    """Percentil por posição mais próxima"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def peak_rss_mb():
+    """Pico de RSS deste processo e dos filhos (pool de renderização), em MB"""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {"self": own / scale, "children": children / scale}
+
+
+def start_emulator(app, url):
+    """Sobe um emulador em uma thread e espera ele aceitar conexões"""
+    parsed = urlparse(url)
+    server = uvicorn.Server(uvicorn.Config(app, host=parsed.hostname, port=parsed.port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def run_iteration(pdf_path, work_dir, client):
+    """Executa o pipeline uma vez e devolve a duração de cada etapa e o número de páginas"""
+    timings = {}
+
+    start = time.perf_counter()
+    with open(pdf_path, "rb") as f:
+        upload = UploadFile(file=f, filename=os.path.basename(pdf_path))
+        tmp_path, _, _ = asyncio.run(stream_upload_to_disk(
+            upload, work_dir, Config.MAX_UPLOAD_SIZE_MB * 1024 * 1024, Config.UPLOAD_CHUNK_SIZE))
+    timings["upload"] = time.perf_counter() - start
+
+    def new_extractor():
+        return ExtratorDadosTecnicos(
+            api_key=Config.MISTRAL_API_KEY,
+            output_dir=os.path.join(work_dir, "output"),
+            figs_dir=os.path.join(work_dir, "figs"),
+            max_workers_ocr=Config.OCR_IMAGE_WORKERS,
+            paginas_por_parte=Config.OCR_PAGES_PER_RANGE,
+            max_workers_partes=Config.OCR_RANGE_WORKERS,
+            max_tentativas_parte=Config.OCR_RANGE_RETRIES
+        )
+
+    start = time.perf_counter()
+    result = asyncio.run(new_extractor().aprocessar_arquivo(tmp_path))
+    timings["extract"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_extractor().processar_arquivo(tmp_path)
+    timings["extract_sync"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    PDFProcessor(tmp_path, Config.MISTRAL_API_KEY).extract_data()
+    timings["pdf_processor"] = time.perf_counter() - start
+
+    sections = [
+        {"type": "section", "title": f"Página {pagina['numero']}", "content": pagina["texto"]}
+        for pagina in ler_paginas(result["arquivo_ndjson"])
+    ]
+    start = time.perf_counter()
+    client.create_slides_from_json(sections)
+    timings["slides_from_json"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    client.create_presentation_from_pdf(tmp_path)
+    timings["presentation_from_pdf"] = time.perf_counter() - start
+
+    os.remove(tmp_path)
+    return timings, result["total_paginas"]
+
+
+def run_benchmark(pdf_path, iterations):
+    start_emulator(mistral_ocr_emulator.app, Config.MISTRAL_SERVER_URL)
+    start_emulator(google_api_emulator.app, Config.GOOGLE_API_EMULATOR_URL)
+    client = GoogleSlidesClient(
+        credentials_path=Config.GOOGLE_CREDENTIALS_JSON,
+        template_presentation_id=Config.TEMPLATE_PRESENTATION_ID
+    )
+
+    samples = {stage: [] for stage in STAGES}
+    pages = 0
+    with tempfile.TemporaryDirectory() as work_dir:
+        for iteration in range(iterations):
+            timings, pages = run_iteration(pdf_path, work_dir, client)
+            for stage, seconds in timings.items():
+                samples[stage].append(seconds)
+            logger.info(f"Iteração {iteration + 1}/{iterations}: {sum(timings.values()):.2f}s")
+
+    totals = [sum(samples[stage][i] for stage in PIPELINE_STAGES) for i in range(iterations)]
+    return {
+        "pdf": os.path.basename(pdf_path),
+        "iterations": iterations,
+        "pages": pages,
+        "pages_per_second": pages / percentile(totals, 0.5) if pages else 0,
+        "stages": {
+            stage: {
+                "p50": percentile(values, 0.5),
+                "p95": percentile(values, 0.95),
+                "mean": sum(values) / len(values)
+            }
+            for stage, values in samples.items()
+        },
+        "pipeline": {"p50": percentile(totals, 0.5), "p95": percentile(totals, 0.95)},
+        "peak_rss_mb": peak_rss_mb(),
+        "api_calls": {
+            "mistral": requests.get(f"{Config.MISTRAL_SERVER_URL}/_emulator/stats").json(),
+            "google": requests.get(f"{Config.GOOGLE_API_EMULATOR_URL}/_emulator/stats").json()
+        }
+    }
+
+
+def find_regressions(result, baseline, tolerance):
+    """Etapas cujo p95 (ou pico de RSS) piorou mais do que a tolerância em relação à base"""
+    regressions = []
+    for stage, stats in result["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if previous and stats["p95"] > previous["p95"] * (1 + tolerance):
+            regressions.append(f"{stage}: p95 {previous['p95']:.3f}s -> {stats['p95']:.3f}s")
+    previous_rss = baseline.get("peak_rss_mb", {}).get("self")
+    if previous_rss and result["peak_rss_mb"]["self"] > previous_rss * (1 + tolerance):
+        regressions.append(f"peak RSS {previous_rss:.1f}MB -> {result['peak_rss_mb']['self']:.1f}MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline upload -> OCR -> slides")
+    parser.add_argument("pdf", help="PDF usado no benchmark")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--output", help="Arquivo onde salvar o resultado em JSON")
+    parser.add_argument("--baseline", help="Resultado anterior para comparação")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Piora relativa aceita (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    result = run_benchmark(args.pdf, args.iterations)
+
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = find_regressions(result, json.load(f), args.tolerance)
+        for regression in regressions:
+            logger.error(f"Regressão: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,11 +15,91 @@ class Config:
     DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY", "your-deepseek-api-key")
     GROQ_API_KEY = os.getenv("GROQ_API_KEY", "your-groq-api-key")
     LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+    MISTRAL_SERVER_URL = os.getenv("MISTRAL_SERVER_URL")  # ex.: emulador local (mistral_ocr_emulator.py)
+
+    # Mistral OCR Emulator Config
+    MISTRAL_EMULATOR_PORT = int(os.getenv("MISTRAL_EMULATOR_PORT", "8091"))
+    MISTRAL_EMULATOR_RECORDINGS_DIR = os.getenv("MISTRAL_EMULATOR_RECORDINGS_DIR", os.path.join("benchmarks", "recordings"))
+    MISTRAL_EMULATOR_SYNTHETIC_PAGES = int(os.getenv("MISTRAL_EMULATOR_SYNTHETIC_PAGES", "10"))
+    MISTRAL_EMULATOR_LATENCY_MS = int(os.getenv("MISTRAL_EMULATOR_LATENCY_MS", "200"))
+    MISTRAL_EMULATOR_LATENCY_PER_PAGE_MS = int(os.getenv("MISTRAL_EMULATOR_LATENCY_PER_PAGE_MS", "50"))
+    MISTRAL_EMULATOR_ERROR_RATE = float(os.getenv("MISTRAL_EMULATOR_ERROR_RATE", "0"))
 
     # Google Slides Config
     TEMPLATE_PRESENTATION_ID = os.getenv('TEMPLATE_PRESENTATION_ID')
     DELETE_TEST_PRESENTATIONS = os.getenv("DELETE_TEST_PRESENTATIONS", "True").lower() == "true"
     SLIDES_DEBUG_MODE = os.getenv("SLIDES_DEBUG_MODE", "True").lower() == "true"
+    SLIDES_WORKERS = int(os.getenv("SLIDES_WORKERS", "4"))  # apresentações geradas em paralelo
+    TEMPLATE_POOL_SIZE = int(os.getenv("TEMPLATE_POOL_SIZE", "0"))  # 0 = sem cópias pré-criadas
+    TEMPLATE_POOL_CHECK_SECONDS = int(os.getenv("TEMPLATE_POOL_CHECK_SECONDS", "60"))
+    TEMPLATE_POOL_VERSION_TTL_SECONDS = float(os.getenv("TEMPLATE_POOL_VERSION_TTL_SECONDS", "5"))  # cache da versão ao entregar cópias
+    PDF_PAGE_WORKERS = int(os.getenv("PDF_PAGE_WORKERS", "4"))  # processos de renderização; <= 1 = em série
+    PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))  # PDFs menores renderizam em série
+    PDF_RENDER_RESOLUTION = int(os.getenv("PDF_RENDER_RESOLUTION", "150"))  # DPI usado para recortar imagens
+
+    # Asset Store Config: imagens dos slides são servidas por URL (o Google precisa alcançá-la)
+    ASSET_STORE_BACKEND = os.getenv("ASSET_STORE_BACKEND", "local")  # "local" ou "s3"
+    ASSETS_DIR = os.getenv("ASSETS_DIR", os.path.join("output", "assets"))
+    ASSETS_PUBLIC_URL = os.getenv("ASSETS_PUBLIC_URL", API_BASE_URL)
+    ASSETS_S3_BUCKET = os.getenv("ASSETS_S3_BUCKET")
+    ASSETS_S3_PREFIX = os.getenv("ASSETS_S3_PREFIX", "assets")
+    ASSETS_S3_ENDPOINT_URL = os.getenv("ASSETS_S3_ENDPOINT_URL")
+
+    # Google API Emulator Config (google_api_emulator.py); com a URL definida o cliente usa o emulador
+    GOOGLE_API_EMULATOR_URL = os.getenv("GOOGLE_API_EMULATOR_URL")
+    GOOGLE_EMULATOR_PORT = int(os.getenv("GOOGLE_EMULATOR_PORT", "8090"))
+    GOOGLE_EMULATOR_LATENCY_MS = int(os.getenv("GOOGLE_EMULATOR_LATENCY_MS", "100"))
+    GOOGLE_EMULATOR_ERROR_RATE = float(os.getenv("GOOGLE_EMULATOR_ERROR_RATE", "0"))  # fração de respostas 429
+    GOOGLE_EMULATOR_QUOTA_PER_MINUTE = int(os.getenv("GOOGLE_EMULATOR_QUOTA_PER_MINUTE", "0"))  # 0 = sem cota
+
+    # Rate Limit Config: (requests per minute, burst) shared by every client in the process
+    RATE_LIMITS = {
+        "slides": (int(os.getenv("SLIDES_REQUESTS_PER_MINUTE", "60")), int(os.getenv("SLIDES_BURST", "10"))),
+        "drive": (int(os.getenv("DRIVE_REQUESTS_PER_MINUTE", "600")), int(os.getenv("DRIVE_BURST", "20"))),
+        "mistral": (int(os.getenv("MISTRAL_REQUESTS_PER_MINUTE", "300")), int(os.getenv("MISTRAL_BURST", "10"))),
+    }
+    API_MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "5"))
+
+    # Job Queue Config
+    JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join("output", "jobs.db"))
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_QUEUE_MAX_PENDING = int(os.getenv("JOB_QUEUE_MAX_PENDING", "50"))
+    JOB_TIMEOUT_SECONDS = int(os.getenv("JOB_TIMEOUT_SECONDS", "600"))  # prazo de cada job; 0 = sem prazo
+    UPLOADS_DIR = os.getenv("UPLOADS_DIR", os.path.join("output", "uploads"))
+    MAX_UPLOAD_SIZE_MB = int(os.getenv("MAX_UPLOAD_SIZE_MB", "100"))
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+    PROGRESS_MAX_MESSAGES_PER_SECOND = float(os.getenv("PROGRESS_MAX_MESSAGES_PER_SECOND", "5"))  # por job
+    PROGRESS_BUFFER_SIZE = int(os.getenv("PROGRESS_BUFFER_SIZE", "200"))  # eventos guardados por job para replay
+    PROGRESS_BUFFER_TTL_SECONDS = int(os.getenv("PROGRESS_BUFFER_TTL_SECONDS", "600"))
+    EVENT_BACKEND = os.getenv("EVENT_BACKEND", "memory")  # "memory" ou "sqlite" (compartilhado entre workers)
+    EVENTS_DB_PATH = os.getenv("EVENTS_DB_PATH", os.path.join("output", "events.db"))
+    EVENT_POLL_INTERVAL = float(os.getenv("EVENT_POLL_INTERVAL", "0.2"))
+    # Cada job em andamento renova seu lease (heartbeat) a cada terço deste tempo; só jobs
+    # com o lease vencido (o processo que os rodava morreu) são retomados por outro worker
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+    WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "100"))
+    WS_PING_INTERVAL = int(os.getenv("WS_PING_INTERVAL", "30"))
+    WS_PING_TIMEOUT = int(os.getenv("WS_PING_TIMEOUT", "10"))
+
+    # OCR Config
+    OCR_IMAGE_WORKERS = int(os.getenv("OCR_IMAGE_WORKERS", "4"))
+    OCR_PAGES_PER_RANGE = int(os.getenv("OCR_PAGES_PER_RANGE", "0"))  # 0 = OCR do PDF inteiro
+    OCR_RANGE_WORKERS = int(os.getenv("OCR_RANGE_WORKERS", "4"))
+    OCR_RANGE_RETRIES = int(os.getenv("OCR_RANGE_RETRIES", "3"))
+    OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "True").lower() == "true"
+    OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", os.path.join("cache", "ocr"))
+    OCR_CACHE_MAX_MB = int(os.getenv("OCR_CACHE_MAX_MB", "1024"))
+    OCR_CACHE_TTL_HOURS = int(os.getenv("OCR_CACHE_TTL_HOURS", str(24 * 30)))
+
+    # Cache Config
+    SLIDES_CACHE_ENABLED = os.getenv("SLIDES_CACHE_ENABLED", "True").lower() == "true"
+    SLIDES_CACHE_DIR = os.getenv("SLIDES_CACHE_DIR", os.path.join("cache", "slides"))
+    SLIDES_CACHE_MAX_MB = int(os.getenv("SLIDES_CACHE_MAX_MB", "50"))
+    SLIDES_CACHE_TTL_HOURS = int(os.getenv("SLIDES_CACHE_TTL_HOURS", "24"))
+    DECK_MANIFEST_DIR = os.getenv("DECK_MANIFEST_DIR", os.path.join("cache", "decks"))
+    DECK_MANIFEST_MAX_MB = int(os.getenv("DECK_MANIFEST_MAX_MB", "20"))
+    DECK_MANIFEST_TTL_HOURS = int(os.getenv("DECK_MANIFEST_TTL_HOURS", str(24 * 30)))
+    CACHE_SWEEP_INTERVAL_SECONDS = int(os.getenv("CACHE_SWEEP_INTERVAL_SECONDS", "600"))
     
     # Use absolute path for local development and relative path for production
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
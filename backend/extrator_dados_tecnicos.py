@@ -17,12 +17,21 @@ import time
 import logging
 import re
 import base64
+import hashlib
 import tempfile
-from typing import Dict, List, Any, Optional, Tuple, Callable
+import textwrap
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterator, AsyncIterator, Awaitable
 import argparse
 from mistralai import Mistral, DocumentURLChunk
 import cv2
 import numpy as np
+from utils.cache_manager import OCRCache, get_ocr_cache, sha256_file
+from utils.rate_limiter import call_with_backoff, acall_with_backoff, get_rate_limiter
+from utils.cancellation import CancellationToken, JobCancelledError
+from config import Config
 
 # Configurar logging
 logging.basicConfig(
@@ -35,6 +44,122 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+OCR_MODEL = "mistral-ocr-latest"
+
+
+def _ler_bytes(caminho: str) -> bytes:
+    """Lê o conteúdo binário de um arquivo."""
+    with open(caminho, "rb") as f:
+        return f.read()
+
+
+def _texto_do_ocr(ocr_result_dict: Dict[str, Any]) -> Optional[str]:
+    """
+    Extrai o texto de um resultado de OCR de imagem.
+
+    Args:
+        ocr_result_dict: Resultado do OCR em formato de dicionário
+
+    Returns:
+        Texto extraído ou None se não houver texto
+    """
+    texto = ""
+    if "text" in ocr_result_dict:
+        texto = ocr_result_dict.get("text", "")
+    else:
+        # Se não houver texto diretamente, tentar extrair de cada página
+        for page in ocr_result_dict.get("pages", []):
+            if "markdown" in page:
+                # Remover referências a imagens do markdown
+                texto_pagina = re.sub(
+                    r'!\[.*?\]\(.*?\)', '', page["markdown"])
+                texto += texto_pagina + "\n\n"
+
+    if texto.strip():
+        logger.info(f"Texto extraído da imagem: {texto[:100]}...")
+        return texto.strip()
+    else:
+        logger.warning("Nenhum texto extraído da imagem")
+        return None
+
+
+def ler_paginas(arquivo_ndjson: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lê, uma a uma, as páginas gravadas por processar_arquivo em um arquivo NDJSON.
+
+    Args:
+        arquivo_ndjson: Caminho para o arquivo NDJSON
+
+    Yields:
+        Dicionário com os dados de cada página
+    """
+    with open(arquivo_ndjson, encoding="utf-8") as f:
+        for linha in f:
+            if linha.strip():
+                yield json.loads(linha)
+
+
+def _dividir_pdf(arquivo_pdf: str, paginas_por_parte: int, destino_dir: str) -> List[Tuple[int, str]]:
+    """
+    Divide um PDF em arquivos menores com até paginas_por_parte páginas cada.
+
+    Args:
+        arquivo_pdf: Caminho para o arquivo PDF
+        paginas_por_parte: Número máximo de páginas por parte
+        destino_dir: Diretório onde as partes serão gravadas
+
+    Returns:
+        Lista de tuplas (índice da primeira página, caminho da parte). Se o PDF não
+        precisar ser dividido, a lista contém apenas o arquivo original.
+    """
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except ImportError:
+        logger.warning("pypdf não instalado; o PDF será enviado ao OCR sem divisão")
+        return [(0, arquivo_pdf)]
+
+    reader = PdfReader(arquivo_pdf)
+    total_paginas = len(reader.pages)
+    if total_paginas <= paginas_por_parte:
+        return [(0, arquivo_pdf)]
+
+    nome_base = os.path.splitext(os.path.basename(arquivo_pdf))[0]
+    partes = []
+    for inicio in range(0, total_paginas, paginas_por_parte):
+        writer = PdfWriter()
+        for page_idx in range(inicio, min(inicio + paginas_por_parte, total_paginas)):
+            writer.add_page(reader.pages[page_idx])
+        caminho = os.path.join(destino_dir, f"{nome_base}_paginas_{inicio+1}.pdf")
+        with open(caminho, "wb") as f:
+            writer.write(f)
+        partes.append((inicio, caminho))
+
+    logger.info(f"PDF com {total_paginas} páginas dividido em {len(partes)} partes")
+    return partes
+
+
+def _juntar_partes(partes: List[Tuple[int, str]], resultados: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Junta os resultados de OCR das partes de um PDF, renumerando as páginas.
+
+    Args:
+        partes: Lista de tuplas (índice da primeira página, caminho da parte)
+        resultados: Resultado do OCR de cada parte, indexado pela posição da parte
+
+    Returns:
+        Resultado do OCR equivalente ao do documento inteiro
+    """
+    paginas = []
+    for i, (inicio, _) in enumerate(partes):
+        for pos, page in enumerate(resultados[i].get("pages", [])):
+            page = dict(page)
+            page["index"] = inicio + page.get("index", pos)
+            paginas.append(page)
+
+    ocr_result_dict = dict(resultados[0])
+    ocr_result_dict["pages"] = sorted(paginas, key=lambda page: page["index"])
+    return ocr_result_dict
+
 
 class ExtratorDadosTecnicos:
     """
@@ -43,7 +168,11 @@ class ExtratorDadosTecnicos:
     """
 
     def __init__(self, api_key: str, output_dir: str = "output", 
-                 figs_dir: str = "figs", progress_callback: Optional[Callable] = None):
+                 figs_dir: str = "figs", progress_callback: Optional[Callable] = None,
+                 max_workers_ocr: int = 4, ocr_cache: Optional[OCRCache] = None,
+                 page_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 paginas_por_parte: int = 0, max_workers_partes: int = 4,
+                 max_tentativas_parte: int = 3, cancelamento: Optional[CancellationToken] = None):
         """
         Inicializa o extrator de dados técnicos.
 
@@ -52,23 +181,324 @@ class ExtratorDadosTecnicos:
             output_dir: Diretório de saída para os arquivos JSON
             figs_dir: Diretório de saída para as imagens extraídas
             progress_callback: Função de callback para atualização de progresso
+            max_workers_ocr: Número máximo de imagens enviadas ao OCR em paralelo
+            ocr_cache: Cache de resultados de OCR (por padrão, o cache global do processo)
+            page_callback: Função chamada com cada página assim que ela fica pronta
+            paginas_por_parte: Se maior que zero, divide PDFs maiores em partes com esse
+                número de páginas, processadas em paralelo pelo OCR
+            max_workers_partes: Número máximo de partes enviadas ao OCR em paralelo
+            max_tentativas_parte: Número de tentativas para cada parte antes de desistir
+            cancelamento: Token do job; o processamento para (JobCancelledError) entre
+                páginas, imagens e chamadas ao Mistral quando ele é cancelado ou expira
         """
-        self.client = Mistral(api_key=api_key)
+        self.client = Mistral(api_key=api_key, server_url=Config.MISTRAL_SERVER_URL)
         self.output_dir = output_dir
         self.figs_dir = figs_dir
         self.progress_callback = progress_callback
+        self.page_callback = page_callback
+        self.max_workers_ocr = max(1, max_workers_ocr)
+        self.paginas_por_parte = paginas_por_parte
+        self.max_workers_partes = max(1, max_workers_partes)
+        self.max_tentativas_parte = max(1, max_tentativas_parte)
+        self.ocr_cache = ocr_cache if ocr_cache is not None else get_ocr_cache()
+        self.cancelamento = cancelamento
         os.makedirs(self.output_dir, exist_ok=True)
         os.makedirs(self.figs_dir, exist_ok=True)
 
+    def _notificar_progresso(self, etapa: str, progresso: int) -> None:
+        """Repassa uma atualização de progresso ao callback, se houver."""
+        if self.progress_callback:
+            self.progress_callback(etapa, progresso)
+
+    def _arquivo_saida(self, arquivo_pdf: str, extensao: str = ".json") -> str:
+        """Caminho do arquivo de saída (JSON ou NDJSON) para um PDF."""
+        return os.path.join(
+            self.output_dir, f"{os.path.splitext(os.path.basename(arquivo_pdf))[0]}{extensao}")
+
+    def _salvar_json(self, cabecalho: Dict[str, Any], arquivo_pdf: str) -> str:
+        """
+        Gera o arquivo JSON no formato antigo a partir do NDJSON, uma página por vez,
+        sem carregar o documento inteiro na memória.
+
+        Args:
+            cabecalho: Campos do resultado além das páginas (arquivo, data_processamento)
+            arquivo_pdf: Caminho para o arquivo PDF
+
+        Returns:
+            Caminho do arquivo JSON gerado
+        """
+        output_file = self._arquivo_saida(arquivo_pdf)
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write("{\n")
+            for chave, valor in cabecalho.items():
+                f.write(f"    {json.dumps(chave)}: {json.dumps(valor, ensure_ascii=False)},\n")
+            f.write('    "paginas": [')
+            separador = "\n"
+            for pagina in ler_paginas(self._arquivo_saida(arquivo_pdf, ".ndjson")):
+                f.write(separador + textwrap.indent(json.dumps(pagina, indent=4, ensure_ascii=False), " " * 8))
+                separador = ",\n"
+            f.write("]\n}" if separador == "\n" else "\n    ]\n}")
+        logger.info(f"Dados extraídos salvos em: {output_file}")
+        return output_file
+
+    def _verificar_cancelamento(self) -> None:
+        """Levanta JobCancelledError se o job foi cancelado ou passou do prazo."""
+        if self.cancelamento:
+            self.cancelamento.check()
+
+    def _timeout_ms(self) -> Optional[int]:
+        """Timeout de uma chamada ao Mistral limitado ao prazo restante do job."""
+        restante = self.cancelamento.remaining() if self.cancelamento else None
+        return max(1, int(restante * 1000)) if restante is not None else None
+
+    def _chamar_mistral(self, fn: Callable[[], Any]) -> Any:
+        """Executa uma chamada ao Mistral pelo limitador de taxa compartilhado, com backoff."""
+        return call_with_backoff(fn, limiter=get_rate_limiter("mistral"), max_retries=Config.API_MAX_RETRIES,
+                                 cancellation=self.cancelamento)
+
+    async def _achamar_mistral(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Versão assíncrona de _chamar_mistral."""
+        return await acall_with_backoff(fn, limiter=get_rate_limiter("mistral"), max_retries=Config.API_MAX_RETRIES,
+                                        cancellation=self.cancelamento)
+
+    def _ocr_documento(self, caminho: str, notificar_envio: bool = False) -> Dict[str, Any]:
+        """
+        Envia um documento ao Mistral e executa o OCR.
+
+        Args:
+            caminho: Caminho para o PDF ou imagem
+            notificar_envio: Se True, reporta a etapa EXTRACTING_TEXT após o upload
+
+        Returns:
+            Resultado do OCR em formato de dicionário
+        """
+        # Documentos idênticos (ex.: logos e cabeçalhos repetidos) reutilizam o OCR anterior
+        content_hash = sha256_file(caminho) if self.ocr_cache else None
+        if content_hash:
+            cached = self.ocr_cache.get_ocr(content_hash, OCR_MODEL)
+            if cached is not None:
+                if notificar_envio:
+                    self._notificar_progresso("EXTRACTING_TEXT", 30)
+                return cached
+
+        def enviar():
+            with open(caminho, "rb") as conteudo:
+                return self.client.files.upload(
+                    file={
+                        "file_name": os.path.basename(caminho),
+                        "content": conteudo
+                    },
+                    purpose="ocr",
+                    timeout_ms=self._timeout_ms()
+                )
+
+        uploaded_file = self._chamar_mistral(enviar)
+        logger.info(f"Arquivo enviado com sucesso. ID: {uploaded_file.id}")
+
+        if notificar_envio:
+            self._notificar_progresso("EXTRACTING_TEXT", 30)
+
+        # Obter URL assinada para o arquivo enviado
+        signed_url = self._chamar_mistral(lambda: self.client.files.get_signed_url(
+            file_id=uploaded_file.id,
+            expiry=1,  # Tempo de expiração em horas
+            timeout_ms=self._timeout_ms()
+        ))
+
+        # Processar OCR para extrair texto e imagens
+        ocr_result = self._chamar_mistral(lambda: self.client.ocr.process(
+            model=OCR_MODEL,
+            document=DocumentURLChunk(document_url=signed_url.url),
+            timeout_ms=self._timeout_ms()
+        ))
+
+        # Converter o resultado para um dicionário
+        ocr_result_dict = ocr_result.model_dump()
+        if content_hash:
+            self.ocr_cache.set_ocr(content_hash, OCR_MODEL, ocr_result_dict)
+        return ocr_result_dict
+
+    async def _aocr_documento(self, caminho: str, notificar_envio: bool = False) -> Dict[str, Any]:
+        """
+        Versão assíncrona de _ocr_documento, executada no event loop.
+
+        Args:
+            caminho: Caminho para o PDF ou imagem
+            notificar_envio: Se True, reporta a etapa EXTRACTING_TEXT após o upload
+
+        Returns:
+            Resultado do OCR em formato de dicionário
+        """
+        conteudo = await asyncio.to_thread(_ler_bytes, caminho)
+
+        content_hash = hashlib.sha256(conteudo).hexdigest() if self.ocr_cache else None
+        if content_hash:
+            cached = await asyncio.to_thread(self.ocr_cache.get_ocr, content_hash, OCR_MODEL)
+            if cached is not None:
+                if notificar_envio:
+                    self._notificar_progresso("EXTRACTING_TEXT", 30)
+                return cached
+
+        uploaded_file = await self._achamar_mistral(lambda: self.client.files.upload_async(
+            file={
+                "file_name": os.path.basename(caminho),
+                "content": conteudo
+            },
+            purpose="ocr",
+            timeout_ms=self._timeout_ms()
+        ))
+        logger.info(f"Arquivo enviado com sucesso. ID: {uploaded_file.id}")
+
+        if notificar_envio:
+            self._notificar_progresso("EXTRACTING_TEXT", 30)
+
+        signed_url = await self._achamar_mistral(lambda: self.client.files.get_signed_url_async(
+            file_id=uploaded_file.id,
+            expiry=1,  # Tempo de expiração em horas
+            timeout_ms=self._timeout_ms()
+        ))
+
+        ocr_result = await self._achamar_mistral(lambda: self.client.ocr.process_async(
+            model=OCR_MODEL,
+            document=DocumentURLChunk(document_url=signed_url.url),
+            timeout_ms=self._timeout_ms()
+        ))
+
+        ocr_result_dict = ocr_result.model_dump()
+        if content_hash:
+            await asyncio.to_thread(self.ocr_cache.set_ocr, content_hash, OCR_MODEL, ocr_result_dict)
+        return ocr_result_dict
+
+    def _ocr_pdf(self, arquivo_pdf: str) -> Dict[str, Any]:
+        """
+        Executa o OCR de um PDF, dividindo-o em intervalos de páginas processados em
+        paralelo quando paginas_por_parte estiver definido.
+
+        Args:
+            arquivo_pdf: Caminho para o arquivo PDF
+
+        Returns:
+            Resultado do OCR em formato de dicionário, com todas as páginas
+        """
+        if self.paginas_por_parte <= 0:
+            return self._ocr_documento(arquivo_pdf, notificar_envio=True)
+
+        content_hash = sha256_file(arquivo_pdf) if self.ocr_cache else None
+        if content_hash:
+            cached = self.ocr_cache.get_ocr(content_hash, OCR_MODEL)
+            if cached is not None:
+                return cached
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            partes = _dividir_pdf(arquivo_pdf, self.paginas_por_parte, tmp_dir)
+            if len(partes) <= 1:
+                return self._ocr_documento(arquivo_pdf, notificar_envio=True)
+
+            logger.info(f"OCR de {len(partes)} partes com até {self.max_workers_partes} em paralelo")
+            self._notificar_progresso("EXTRACTING_TEXT", 30)
+
+            resultados: Dict[int, Dict[str, Any]] = {}
+            pendentes = list(range(len(partes)))
+            with ThreadPoolExecutor(max_workers=self.max_workers_partes) as executor:
+                for tentativa in range(1, self.max_tentativas_parte + 1):
+                    self._verificar_cancelamento()
+                    futures = {i: executor.submit(self._ocr_documento, partes[i][1]) for i in pendentes}
+                    pendentes = []
+                    for i, future in futures.items():
+                        try:
+                            resultados[i] = future.result()
+                        except JobCancelledError:
+                            raise
+                        except Exception as e:
+                            logger.warning(f"Falha no OCR da parte {i+1} (tentativa {tentativa}): {str(e)}")
+                            pendentes.append(i)
+                    if not pendentes:
+                        break
+
+        if pendentes:
+            raise Exception(f"Falha no OCR das partes {[i + 1 for i in pendentes]} após {self.max_tentativas_parte} tentativas")
+
+        ocr_result_dict = _juntar_partes(partes, resultados)
+        if content_hash:
+            self.ocr_cache.set_ocr(content_hash, OCR_MODEL, ocr_result_dict)
+        return ocr_result_dict
+
+    async def _aocr_pdf(self, arquivo_pdf: str) -> Dict[str, Any]:
+        """
+        Versão assíncrona de _ocr_pdf.
+
+        Args:
+            arquivo_pdf: Caminho para o arquivo PDF
+
+        Returns:
+            Resultado do OCR em formato de dicionário, com todas as páginas
+        """
+        if self.paginas_por_parte <= 0:
+            return await self._aocr_documento(arquivo_pdf, notificar_envio=True)
+
+        content_hash = await asyncio.to_thread(sha256_file, arquivo_pdf) if self.ocr_cache else None
+        if content_hash:
+            cached = await asyncio.to_thread(self.ocr_cache.get_ocr, content_hash, OCR_MODEL)
+            if cached is not None:
+                return cached
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            partes = await asyncio.to_thread(_dividir_pdf, arquivo_pdf, self.paginas_por_parte, tmp_dir)
+            if len(partes) <= 1:
+                return await self._aocr_documento(arquivo_pdf, notificar_envio=True)
+
+            logger.info(f"OCR de {len(partes)} partes com até {self.max_workers_partes} em paralelo")
+            self._notificar_progresso("EXTRACTING_TEXT", 30)
+
+            semaforo = asyncio.Semaphore(self.max_workers_partes)
+
+            async def ocr_limitado(caminho: str) -> Dict[str, Any]:
+                async with semaforo:
+                    return await self._aocr_documento(caminho)
+
+            resultados: Dict[int, Dict[str, Any]] = {}
+            pendentes = list(range(len(partes)))
+            for tentativa in range(1, self.max_tentativas_parte + 1):
+                self._verificar_cancelamento()
+                respostas = await asyncio.gather(
+                    *(ocr_limitado(partes[i][1]) for i in pendentes),
+                    return_exceptions=True
+                )
+                falhas = []
+                for i, resposta in zip(pendentes, respostas):
+                    if isinstance(resposta, JobCancelledError):
+                        raise resposta
+                    if isinstance(resposta, Exception):
+                        logger.warning(f"Falha no OCR da parte {i+1} (tentativa {tentativa}): {str(resposta)}")
+                        falhas.append(i)
+                    else:
+                        resultados[i] = resposta
+                pendentes = falhas
+                if not pendentes:
+                    break
+
+        if pendentes:
+            raise Exception(f"Falha no OCR das partes {[i + 1 for i in pendentes]} após {self.max_tentativas_parte} tentativas")
+
+        ocr_result_dict = _juntar_partes(partes, resultados)
+        if content_hash:
+            await asyncio.to_thread(self.ocr_cache.set_ocr, content_hash, OCR_MODEL, ocr_result_dict)
+        return ocr_result_dict
+
     def processar_arquivo(self, arquivo_pdf: str) -> Dict[str, Any]:
         """
         Processa um arquivo PDF para extrair textos e imagens.
 
+        Cada página processada é anexada ao arquivo NDJSON de saída e repassada ao
+        page_callback assim que fica pronta; as páginas não ficam na memória. No fim, o
+        JSON no formato antigo é gerado a partir do NDJSON.
+
         Args:
             arquivo_pdf: Caminho para o arquivo PDF
 
         Returns:
-            Dicionário com os dados extraídos
+            Dicionário com arquivo, data_processamento, total_paginas e os caminhos dos
+            arquivos gerados (arquivo_ndjson, arquivo_json); use ler_paginas para ler as páginas
         """
         logger.info(f"Processando arquivo: {arquivo_pdf}")
 
@@ -79,59 +509,117 @@ class ExtratorDadosTecnicos:
 
         # Upload do arquivo para o Mistral OCR
         try:
-            if self.progress_callback:
-                self.progress_callback("PROCESSING_PDF", 10)
-
-            uploaded_file = self.client.files.upload(
-                file={
-                    "file_name": os.path.basename(arquivo_pdf),
-                    "content": open(arquivo_pdf, "rb")
-                },
-                purpose="ocr"
-            )
-            logger.info(f"Arquivo enviado com sucesso. ID: {uploaded_file.id}")
-
-            if self.progress_callback:
-                self.progress_callback("EXTRACTING_TEXT", 30)
-
-            # Obter URL assinada para o arquivo enviado
-            signed_url = self.client.files.get_signed_url(
-                file_id=uploaded_file.id,
-                expiry=1  # Tempo de expiração em horas
-            )
-
-            # Processar OCR para extrair texto e imagens
-            ocr_result = self.client.ocr.process(
-                model="mistral-ocr-latest",
-                document=DocumentURLChunk(document_url=signed_url.url)
-            )
-
-            # Converter o resultado para um dicionário
-            ocr_result_dict = ocr_result.model_dump()
-
-            if self.progress_callback:
-                self.progress_callback("GENERATING_JSON", 60)
-
-            # Extrair e processar os dados
-            dados_processados = self.processar_resultado_ocr(
-                ocr_result_dict, arquivo_pdf)
-
-            # Salvar o resultado em um arquivo JSON
-            output_file = os.path.join(
-                self.output_dir, f"{os.path.splitext(os.path.basename(arquivo_pdf))[0]}.json")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(dados_processados, f, indent=4, ensure_ascii=False)
-                logger.info(f"Dados extraídos salvos em: {output_file}")
-
-            if self.progress_callback:
-                self.progress_callback("COMPLETE", 100)
-
-            return dados_processados
+            self._notificar_progresso("PROCESSING_PDF", 10)
+
+            ocr_result_dict = self._ocr_pdf(arquivo_pdf)
+
+            self._notificar_progresso("GENERATING_JSON", 60)
+
+            # Extrair e processar os dados página a página; as páginas vão direto para o NDJSON
+            cabecalho = self._novo_cabecalho(arquivo_pdf)
+            total_paginas = len(ocr_result_dict.get("pages", []))
+            paginas_prontas = 0
+            with open(self._arquivo_saida(arquivo_pdf, ".ndjson"), "w", encoding="utf-8") as ndjson:
+                for info_pagina in self.iterar_paginas(ocr_result_dict, arquivo_pdf):
+                    paginas_prontas += 1
+                    self._registrar_pagina(info_pagina, ndjson, paginas_prontas, total_paginas)
+
+            # Gerar o JSON no formato antigo a partir do NDJSON
+            self._salvar_json(cabecalho, arquivo_pdf)
+
+            self._notificar_progresso("COMPLETE", 100)
+
+            return self._resumo(cabecalho, arquivo_pdf, paginas_prontas)
 
         except Exception as e:
             logger.error(f"Erro ao processar o arquivo: {str(e)}")
             raise
 
+    async def aprocessar_arquivo(self, arquivo_pdf: str) -> Dict[str, Any]:
+        """
+        Versão assíncrona de processar_arquivo.
+
+        O upload, a URL assinada e o OCR da página e das imagens rodam como corrotinas
+        no event loop; apenas o trabalho local (decodificar imagens, gravar arquivos)
+        vai para threads.
+
+        Args:
+            arquivo_pdf: Caminho para o arquivo PDF
+
+        Returns:
+            Mesmo resumo retornado por processar_arquivo
+        """
+        logger.info(f"Processando arquivo (async): {arquivo_pdf}")
+
+        if not os.path.exists(arquivo_pdf):
+            logger.error(f"Arquivo não encontrado: {arquivo_pdf}")
+            raise FileNotFoundError(f"Arquivo não encontrado: {arquivo_pdf}")
+
+        try:
+            self._notificar_progresso("PROCESSING_PDF", 10)
+
+            ocr_result_dict = await self._aocr_pdf(arquivo_pdf)
+
+            self._notificar_progresso("GENERATING_JSON", 60)
+
+            cabecalho = self._novo_cabecalho(arquivo_pdf)
+            total_paginas = len(ocr_result_dict.get("pages", []))
+            paginas_prontas = 0
+            with open(self._arquivo_saida(arquivo_pdf, ".ndjson"), "w", encoding="utf-8") as ndjson:
+                async for info_pagina in self.aiterar_paginas(ocr_result_dict, arquivo_pdf):
+                    paginas_prontas += 1
+                    self._registrar_pagina(info_pagina, ndjson, paginas_prontas, total_paginas)
+
+            await asyncio.to_thread(self._salvar_json, cabecalho, arquivo_pdf)
+
+            self._notificar_progresso("COMPLETE", 100)
+
+            return self._resumo(cabecalho, arquivo_pdf, paginas_prontas)
+
+        except Exception as e:
+            logger.error(f"Erro ao processar o arquivo: {str(e)}")
+            raise
+
+    def _novo_cabecalho(self, arquivo_pdf: str) -> Dict[str, Any]:
+        """Campos do resultado de um PDF além das páginas."""
+        return {
+            "arquivo": os.path.basename(arquivo_pdf),
+            "data_processamento": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+    def _novo_resultado(self, arquivo_pdf: str) -> Dict[str, Any]:
+        """Estrutura vazia para armazenar os dados processados de um PDF."""
+        return {**self._novo_cabecalho(arquivo_pdf), "paginas": []}
+
+    def _resumo(self, cabecalho: Dict[str, Any], arquivo_pdf: str, total_paginas: int) -> Dict[str, Any]:
+        """Resultado de processar_arquivo: onde as páginas foram gravadas, sem as páginas."""
+        return {
+            **cabecalho,
+            "total_paginas": total_paginas,
+            "arquivo_ndjson": self._arquivo_saida(arquivo_pdf, ".ndjson"),
+            "arquivo_json": self._arquivo_saida(arquivo_pdf)
+        }
+
+    def _registrar_pagina(self, info_pagina: Dict[str, Any], ndjson, paginas_prontas: int,
+                          total_paginas: int) -> None:
+        """
+        Registra uma página pronta: grava no NDJSON e notifica. A página não fica na
+        memória depois disso.
+
+        Args:
+            info_pagina: Página processada
+            ndjson: Arquivo NDJSON aberto para escrita
+            paginas_prontas: Número de páginas registradas até agora, incluindo esta
+            total_paginas: Total de páginas do documento
+        """
+        ndjson.write(json.dumps(info_pagina, ensure_ascii=False) + "\n")
+        ndjson.flush()
+
+        if self.page_callback:
+            self.page_callback(info_pagina)
+        if total_paginas:
+            self._notificar_progresso("GENERATING_JSON", 60 + int(10 * paginas_prontas / total_paginas))
+
     def processar_resultado_ocr(self, ocr_result: Dict[str, Any], arquivo_pdf: str) -> Dict[str, Any]:
         """
         Processa o resultado do OCR para extrair textos e imagens.
@@ -143,74 +631,195 @@ class ExtratorDadosTecnicos:
         Returns:
             Dicionário com os dados processados
         """
+        dados_processados = self._novo_resultado(arquivo_pdf)
+        dados_processados["paginas"].extend(self.iterar_paginas(ocr_result, arquivo_pdf))
+        return dados_processados
+
+    def iterar_paginas(self, ocr_result: Dict[str, Any], arquivo_pdf: str) -> Iterator[Dict[str, Any]]:
+        """
+        Gera as páginas processadas, em ordem, à medida que ficam prontas.
+
+        O OCR das imagens roda em paralelo (até max_workers_ocr) e pode adiantar as
+        páginas seguintes enquanto a página atual aguarda as suas imagens. As páginas
+        do resultado do OCR são liberadas conforme são processadas.
+
+        Args:
+            ocr_result: Resultado do OCR em formato de dicionário
+            arquivo_pdf: Caminho para o arquivo PDF original
+
+        Yields:
+            Dicionário com os dados de cada página
+        """
         logger.info("Processando resultado do OCR...")
+        nome_base = os.path.splitext(os.path.basename(arquivo_pdf))[0]
+        paginas = ocr_result.get("pages", [])
+        limite_em_voo = 2 * self.max_workers_ocr
+
+        with ThreadPoolExecutor(max_workers=self.max_workers_ocr) as executor:
+            pendentes = deque()
+            for page_idx in range(len(paginas)):
+                self._verificar_cancelamento()
+                info_pagina, imagens = self._montar_pagina(paginas[page_idx], page_idx, nome_base)
+                paginas[page_idx] = None
+                tarefas = [(img_info, img_path, executor.submit(self._ocr_imagem, img_path))
+                           for img_info, img_path in imagens]
+                pendentes.append((info_pagina, tarefas))
+
+                # Entregar as páginas da frente que já estão prontas, ou esperar por elas
+                # quando houver imagens demais em voo
+                while pendentes:
+                    em_voo = sum(1 for _, tarefas_pagina in pendentes
+                                 for _, _, future in tarefas_pagina if not future.done())
+                    pronta = all(future.done() for _, _, future in pendentes[0][1])
+                    if not pronta and em_voo <= limite_em_voo:
+                        break
+                    yield self._concluir_pagina(*pendentes.popleft())
+
+            while pendentes:
+                yield self._concluir_pagina(*pendentes.popleft())
+
+    async def aiterar_paginas(self, ocr_result: Dict[str, Any], arquivo_pdf: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Versão assíncrona de iterar_paginas, com no máximo max_workers_ocr
+        requisições de OCR simultâneas.
 
-        # Extrair informações básicas
-        nome_arquivo = os.path.basename(arquivo_pdf)
+        Args:
+            ocr_result: Resultado do OCR em formato de dicionário
+            arquivo_pdf: Caminho para o arquivo PDF original
 
-        # Estrutura para armazenar os dados processados
-        dados_processados = {
-            "arquivo": nome_arquivo,
-            "data_processamento": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "paginas": []
-        }
+        Yields:
+            Dicionário com os dados de cada página
+        """
+        logger.info("Processando resultado do OCR...")
+        nome_base = os.path.splitext(os.path.basename(arquivo_pdf))[0]
+        paginas = ocr_result.get("pages", [])
+        limite_em_voo = 2 * self.max_workers_ocr
+        semaforo = asyncio.Semaphore(self.max_workers_ocr)
 
-        # Processar cada página
-        for page_idx, page in enumerate(ocr_result.get("pages", [])):
-            logger.info(f"Processando página {page_idx+1}")
+        async def ocr_limitado(img_path: str) -> Optional[str]:
+            async with semaforo:
+                return await self._aocr_imagem(img_path)
 
-            # Extrair texto da página
-            texto_pagina = ""
-            if "markdown" in page:
-                # Remover referências a imagens do markdown
-                texto_pagina = re.sub(r'!\[.*?\]\(.*?\)', '', page["markdown"])
+        pendentes = deque()
+        try:
+            for page_idx in range(len(paginas)):
+                self._verificar_cancelamento()
+                info_pagina, imagens = await asyncio.to_thread(
+                    self._montar_pagina, paginas[page_idx], page_idx, nome_base)
+                paginas[page_idx] = None
+                tarefas = [(img_info, img_path, asyncio.ensure_future(ocr_limitado(img_path)))
+                           for img_info, img_path in imagens]
+                pendentes.append((info_pagina, tarefas))
+
+                while pendentes:
+                    em_voo = sum(1 for _, tarefas_pagina in pendentes
+                                 for _, _, task in tarefas_pagina if not task.done())
+                    pronta = all(task.done() for _, _, task in pendentes[0][1])
+                    if not pronta and em_voo <= limite_em_voo:
+                        break
+                    info_pagina, tarefas = pendentes.popleft()
+                    if tarefas:
+                        await asyncio.wait([task for _, _, task in tarefas])
+                    yield self._concluir_pagina(info_pagina, tarefas)
+
+            while pendentes:
+                info_pagina, tarefas = pendentes.popleft()
+                if tarefas:
+                    await asyncio.wait([task for _, _, task in tarefas])
+                yield self._concluir_pagina(info_pagina, tarefas)
+        finally:
+            for _, tarefas in pendentes:
+                for _, _, task in tarefas:
+                    task.cancel()
+
+    def _montar_pagina(self, page: Dict[str, Any], page_idx: int,
+                       nome_base: str) -> Tuple[Dict[str, Any], List[Tuple[Dict[str, Any], str]]]:
+        """
+        Monta as informações de uma página e salva as suas imagens.
 
-            # Estrutura para armazenar informações da página
-            info_pagina = {
-                "numero": page_idx + 1,
-                "texto": texto_pagina.strip(),
-                "imagens": []
-            }
+        Args:
+            page: Página do resultado do OCR
+            page_idx: Índice da página
+            nome_base: Nome base para os arquivos de imagem
 
-            # Processar imagens da página
-            for img_idx, img in enumerate(page.get("images", [])):
-                # Extrair informações da imagem
-                img_info = {
-                    "id": f"img_{page_idx+1}_{img_idx+1}",
-                    "posicao": {
-                        "top_left_x": img.get("top_left_x", 0),
-                        "top_left_y": img.get("top_left_y", 0),
-                        "bottom_right_x": img.get("bottom_right_x", 0),
-                        "bottom_right_y": img.get("bottom_right_y", 0)
-                    }
+        Returns:
+            Tupla (informações da página, imagens salvas que ainda precisam de OCR)
+        """
+        logger.info(f"Processando página {page_idx+1}")
+
+        # Extrair texto da página
+        texto_pagina = ""
+        if "markdown" in page:
+            # Remover referências a imagens do markdown
+            texto_pagina = re.sub(r'!\[.*?\]\(.*?\)', '', page["markdown"])
+
+        # Estrutura para armazenar informações da página
+        info_pagina = {
+            "numero": page_idx + 1,
+            "texto": texto_pagina.strip(),
+            "imagens": []
+        }
+
+        # Imagens salvas que ainda precisam de OCR: (img_info, caminho)
+        imagens_para_ocr = []
+
+        # Processar imagens da página
+        for img_idx, img in enumerate(page.get("images", [])):
+            # Extrair informações da imagem
+            img_info = {
+                "id": f"img_{page_idx+1}_{img_idx+1}",
+                "posicao": {
+                    "top_left_x": img.get("top_left_x", 0),
+                    "top_left_y": img.get("top_left_y", 0),
+                    "bottom_right_x": img.get("bottom_right_x", 0),
+                    "bottom_right_y": img.get("bottom_right_y", 0)
                 }
+            }
 
-                # Se a imagem tiver dados base64, salvar a imagem e extrair texto
-                if img.get("image_base64"):
-                    # Salvar a imagem
-                    img_path = self.salvar_imagem(
-                        img["image_base64"],
-                        os.path.splitext(nome_arquivo)[0],
-                        page_idx,
-                        img_idx
-                    )
+            # Se a imagem tiver dados base64, salvar a imagem para o OCR
+            if img.get("image_base64"):
+                # Salvar a imagem
+                img_path = self.salvar_imagem(
+                    img["image_base64"],
+                    nome_base,
+                    page_idx,
+                    img_idx
+                )
 
-                    if img_path:
-                        img_info["caminho_arquivo"] = os.path.relpath(
-                            img_path, start=os.getcwd())
+                if img_path:
+                    img_info["caminho_arquivo"] = os.path.relpath(
+                        img_path, start=os.getcwd())
+                    imagens_para_ocr.append((img_info, img_path))
 
-                        # Extrair texto da imagem
-                        texto_imagem = self.extrair_texto_imagem(img_path)
-                        if texto_imagem:
-                            img_info["texto_extraido"] = texto_imagem
+            # Adicionar informações da imagem à página
+            info_pagina["imagens"].append(img_info)
 
-                # Adicionar informações da imagem à página
-                info_pagina["imagens"].append(img_info)
+        return info_pagina, imagens_para_ocr
 
-            # Adicionar informações da página aos dados processados
-            dados_processados["paginas"].append(info_pagina)
+    def _concluir_pagina(self, info_pagina: Dict[str, Any], tarefas: list) -> Dict[str, Any]:
+        """
+        Grava o texto extraído de cada imagem da página. A falha de uma imagem fica
+        registrada apenas nela, sem afetar as demais.
 
-        return dados_processados
+        Args:
+            info_pagina: Informações da página
+            tarefas: Lista de tuplas (informações da imagem, caminho, future/task do OCR)
+
+        Returns:
+            A página com o texto das imagens preenchido
+        """
+        for img_info, img_path, tarefa in tarefas:
+            try:
+                texto_imagem = tarefa.result()
+            except JobCancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro ao extrair texto da imagem {img_path}: {str(e)}")
+                img_info["erro_ocr"] = str(e)
+                continue
+            if texto_imagem:
+                img_info["texto_extraido"] = texto_imagem
+        return info_pagina
 
     def salvar_imagem(self, image_base64: str, nome_base: str, page_idx: int, img_idx: int) -> Optional[str]:
         """
@@ -261,57 +870,40 @@ class ExtratorDadosTecnicos:
         Returns:
             Texto extraído da imagem ou None se falhar
         """
-        logger.info(f"Extraindo texto da imagem: {img_path}")
-
         try:
-            # Upload da imagem para o Mistral
-            uploaded_file = self.client.files.upload(
-                file={
-                    "file_name": os.path.basename(img_path),
-                    "content": open(img_path, "rb")
-                },
-                purpose="ocr"
-            )
-
-            # Obter URL assinada para a imagem enviada
-            signed_url = self.client.files.get_signed_url(
-                file_id=uploaded_file.id,
-                expiry=1  # Tempo de expiração em horas
-            )
-
-            # Processar OCR para extrair texto da imagem
-            ocr_result = self.client.ocr.process(
-                model="mistral-ocr-latest",
-                document=DocumentURLChunk(document_url=signed_url.url)
-            )
-
-            # Converter o resultado para um dicionário
-            ocr_result_dict = ocr_result.model_dump()
-
-            # Extrair texto da imagem
-            texto = ""
-            if "text" in ocr_result_dict:
-                texto = ocr_result_dict.get("text", "")
-            else:
-                # Se não houver texto diretamente, tentar extrair de cada página
-                for page in ocr_result_dict.get("pages", []):
-                    if "markdown" in page:
-                        # Remover referências a imagens do markdown
-                        texto_pagina = re.sub(
-                            r'!\[.*?\]\(.*?\)', '', page["markdown"])
-                        texto += texto_pagina + "\n\n"
-
-            if texto.strip():
-                logger.info(f"Texto extraído da imagem: {texto[:100]}...")
-                return texto.strip()
-            else:
-                logger.warning("Nenhum texto extraído da imagem")
-                return None
-
+            return self._ocr_imagem(img_path)
         except Exception as e:
             logger.error(f"Erro ao extrair texto da imagem: {str(e)}")
             return None
 
+    def _ocr_imagem(self, img_path: str) -> Optional[str]:
+        """
+        Executa o OCR de uma imagem, propagando erros da API.
+
+        Args:
+            img_path: Caminho para o arquivo de imagem
+
+        Returns:
+            Texto extraído da imagem ou None se não houver texto
+        """
+        self._verificar_cancelamento()
+        logger.info(f"Extraindo texto da imagem: {img_path}")
+        return _texto_do_ocr(self._ocr_documento(img_path))
+
+    async def _aocr_imagem(self, img_path: str) -> Optional[str]:
+        """
+        Versão assíncrona de _ocr_imagem.
+
+        Args:
+            img_path: Caminho para o arquivo de imagem
+
+        Returns:
+            Texto extraído da imagem ou None se não houver texto
+        """
+        self._verificar_cancelamento()
+        logger.info(f"Extraindo texto da imagem: {img_path}")
+        return _texto_do_ocr(await self._aocr_documento(img_path))
+
     def processar_diretorio(self, diretorio: str) -> List[Dict[str, Any]]:
         """
         Processa todos os arquivos PDF em um diretório.
@@ -320,7 +912,7 @@ class ExtratorDadosTecnicos:
             diretorio: Caminho para o diretório contendo arquivos PDF
 
         Returns:
-            Lista de dicionários com os dados extraídos de cada arquivo
+            Lista com o resumo de processar_arquivo de cada arquivo
         """
         logger.info(f"Processando diretório: {diretorio}")
 
@@ -0,0 +1,319 @@
+"""
+Emulador local do subconjunto das APIs Google Slides v1 e Drive v3 usado pelo GoogleSlidesClient.
+
+Serve para medir contagem de requests, throughput e o comportamento do backoff sem
+gastar a cota real. Latência, erros de rate limit e cota são configurados em Config
+(GOOGLE_EMULATOR_*). Para apontar o cliente para o emulador, defina
+GOOGLE_API_EMULATOR_URL (ex.: http://localhost:8090) e rode:
+
+    python google_api_emulator.py
+"""
+import time
+import uuid
+import random
+import asyncio
+import logging
+import threading
+from collections import defaultdict, deque
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="Google Slides/Drive emulator")
+
+_lock = threading.Lock()
+_presentations = {}
+_files = {}
+_stats = defaultdict(int)
+_batch_sizes = []
+_calls = defaultdict(deque)
+
+
+class EmulatorError(Exception):
+    """Erro devolvido no formato JSON das APIs Google"""
+
+    def __init__(self, code: int, status: str, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+@app.exception_handler(EmulatorError)
+async def emulator_error_handler(request: Request, exc: EmulatorError):
+    headers = {"Retry-After": str(int(exc.retry_after))} if exc.retry_after else None
+    return JSONResponse(
+        status_code=exc.code,
+        content={"error": {"code": exc.code, "message": exc.message, "status": exc.status}},
+        headers=headers
+    )
+
+
+async def _simulate(api: str, operation: str) -> None:
+    """Aplica latência, cota por minuto e erros aleatórios de rate limit"""
+    latency = Config.GOOGLE_EMULATOR_LATENCY_MS / 1000
+    if latency:
+        await asyncio.sleep(random.uniform(0.5 * latency, 1.5 * latency))
+
+    now = time.monotonic()
+    with _lock:
+        _stats[f"{api}.{operation}"] += 1
+        calls = _calls[api]
+        while calls and now - calls[0] > 60:
+            calls.popleft()
+        quota_exceeded = Config.GOOGLE_EMULATOR_QUOTA_PER_MINUTE and len(calls) >= Config.GOOGLE_EMULATOR_QUOTA_PER_MINUTE
+        if quota_exceeded:
+            _stats["rate_limited"] += 1
+            retry_after = 60 - (now - calls[0])
+        else:
+            calls.append(now)
+
+    if quota_exceeded:
+        raise EmulatorError(429, "RESOURCE_EXHAUSTED", f"Quota exceeded for {api}", retry_after=max(1, retry_after))
+    if random.random() < Config.GOOGLE_EMULATOR_ERROR_RATE:
+        with _lock:
+            _stats["rate_limited"] += 1
+        raise EmulatorError(429, "RESOURCE_EXHAUSTED", "Simulated rate limit", retry_after=1)
+
+
+def _new_slide(object_id: str = None) -> dict:
+    object_id = object_id or f"p{uuid.uuid4().hex[:10]}"
+    return {
+        "objectId": object_id,
+        "pageElements": [],
+        "slideProperties": {"notesPage": {"notesProperties": {"speakerNotesObjectId": f"{object_id}_notes"}}}
+    }
+
+
+def _new_presentation(title: str) -> dict:
+    presentation_id = uuid.uuid4().hex + uuid.uuid4().hex[:12]
+    presentation = {"presentationId": presentation_id, "title": title, "slides": [_new_slide()]}
+    _presentations[presentation_id] = presentation
+    _files[presentation_id] = {"id": presentation_id, "name": title, "version": "1", "trashed": False}
+    return presentation
+
+
+def _get_presentation(presentation_id: str) -> dict:
+    presentation = _presentations.get(presentation_id)
+    if presentation is None or _files[presentation_id]["trashed"]:
+        raise EmulatorError(404, "NOT_FOUND", f"Requested entity was not found: {presentation_id}")
+    return presentation
+
+
+def _object_ids(presentation: dict) -> set:
+    ids = set()
+    for slide in presentation["slides"]:
+        ids.add(slide["objectId"])
+        ids.update(element["objectId"] for element in slide["pageElements"])
+    return ids
+
+
+def _find_slide(presentation: dict, slide_id: str) -> dict:
+    for slide in presentation["slides"]:
+        if slide["objectId"] == slide_id:
+            return slide
+    raise EmulatorError(400, "INVALID_ARGUMENT", f"The object ({slide_id}) could not be found.")
+
+
+def _find_element(presentation: dict, object_id: str) -> dict:
+    for slide in presentation["slides"]:
+        for element in slide["pageElements"]:
+            if element["objectId"] == object_id:
+                return element
+    raise EmulatorError(400, "INVALID_ARGUMENT", f"The object ({object_id}) could not be found.")
+
+
+def _new_object_id(presentation: dict, object_id: str = None) -> str:
+    if object_id is None:
+        return f"g{uuid.uuid4().hex[:12]}"
+    if object_id in _object_ids(presentation):
+        raise EmulatorError(400, "INVALID_ARGUMENT", f"The object ID ({object_id}) should be unique.")
+    return object_id
+
+
+def _add_element(presentation: dict, body: dict, kind: str, **fields) -> dict:
+    page_id = body["elementProperties"]["pageObjectId"]
+    element = {"objectId": _new_object_id(presentation, body.get("objectId")), kind: fields, "text": ""}
+    _find_slide(presentation, page_id)["pageElements"].append(element)
+    return {"objectId": element["objectId"]}
+
+
+def _apply_request(presentation: dict, request: dict) -> dict:
+    """Aplica um request do batchUpdate e devolve a resposta correspondente"""
+    (kind, body), = request.items()
+    if kind == "createSlide":
+        slide = _new_slide(_new_object_id(presentation, body.get("objectId")))
+        for mapping in body.get("placeholderIdMappings", []):
+            slide["pageElements"].append({
+                "objectId": _new_object_id(presentation, mapping["objectId"]),
+                "shape": {"shapeType": "TEXT_BOX", "placeholder": mapping["layoutPlaceholder"]},
+                "text": ""
+            })
+        index = body.get("insertionIndex", len(presentation["slides"]))
+        presentation["slides"].insert(index, slide)
+        return {"createSlide": {"objectId": slide["objectId"]}}
+    if kind == "deleteObject":
+        for slide in presentation["slides"]:
+            if slide["objectId"] == body["objectId"]:
+                presentation["slides"].remove(slide)
+                return {}
+            for element in slide["pageElements"]:
+                if element["objectId"] == body["objectId"]:
+                    slide["pageElements"].remove(element)
+                    return {}
+        raise EmulatorError(400, "INVALID_ARGUMENT", f"The object ({body['objectId']}) could not be found.")
+    if kind == "insertText":
+        element = _find_element(presentation, body["objectId"])
+        index = body.get("insertionIndex", 0)
+        element["text"] = element["text"][:index] + body["text"] + element["text"][index:]
+        return {}
+    if kind == "createShape":
+        return {"createShape": _add_element(presentation, body, "shape", shapeType=body["shapeType"])}
+    if kind == "createImage":
+        return {"createImage": _add_element(presentation, body, "image", contentUrl=body["url"])}
+    if kind == "createTable":
+        return {"createTable": _add_element(presentation, body, "table", rows=body["rows"], columns=body["columns"])}
+    if kind == "replaceAllText":
+        search = body["containsText"]["text"]
+        pages = set(body.get("pageObjectIds") or [])
+        changed = 0
+        for slide in presentation["slides"]:
+            if pages and slide["objectId"] not in pages:
+                continue
+            for element in slide["pageElements"]:
+                changed += element["text"].count(search)
+                element["text"] = element["text"].replace(search, body["replaceText"])
+        return {"replaceAllText": {"occurrencesChanged": changed}}
+    if kind == "replaceAllShapesWithImage":
+        return {"replaceAllShapesWithImage": {"occurrencesChanged": 0}}
+    if kind == "duplicateObject":
+        source = _find_slide(presentation, body["objectId"])
+        new_id = _new_object_id(presentation, body.get("objectIds", {}).get(body["objectId"]))
+        duplicate = _new_slide(new_id)
+        duplicate["pageElements"] = [
+            dict(element, objectId=f"{new_id}_{element['objectId']}") for element in source["pageElements"]
+        ]
+        presentation["slides"].insert(presentation["slides"].index(source) + 1, duplicate)
+        return {"duplicateObject": {"objectId": new_id}}
+    if kind == "updateSlidesPosition":
+        moving = [_find_slide(presentation, slide_id) for slide_id in body["slideObjectIds"]]
+        remaining = [slide for slide in presentation["slides"] if slide not in moving]
+        index = int(body["insertionIndex"])
+        presentation["slides"] = remaining[:index] + moving + remaining[index:]
+        return {}
+    raise EmulatorError(400, "INVALID_ARGUMENT", f"Unsupported request in emulator: {kind}")
+
+
+# Slides v1
+
+@app.post("/v1/presentations")
+async def create_presentation(request: Request):
+    await _simulate("slides", "presentations.create")
+    body = await request.json()
+    with _lock:
+        return _new_presentation(body.get("title", "Untitled"))
+
+
+@app.get("/v1/presentations/{presentation_id}")
+async def get_presentation(presentation_id: str):
+    await _simulate("slides", "presentations.get")
+    with _lock:
+        return _get_presentation(presentation_id)
+
+
+@app.post("/v1/presentations/{presentation_id}:batchUpdate")
+async def batch_update(presentation_id: str, request: Request):
+    await _simulate("slides", "presentations.batchUpdate")
+    body = await request.json()
+    requests = body.get("requests", [])
+    with _lock:
+        _batch_sizes.append(len(requests))
+        presentation = _get_presentation(presentation_id)
+        # Como na API real, o batch é atômico: nada é aplicado se um request falhar
+        working = {**presentation, "slides": [
+            dict(slide, pageElements=[dict(element) for element in slide["pageElements"]])
+            for slide in presentation["slides"]
+        ]}
+        replies = [_apply_request(working, item) for item in requests]
+        _presentations[presentation_id] = working
+        return {"presentationId": presentation_id, "replies": replies}
+
+
+@app.get("/v1/presentations/{presentation_id}/pages/{page_id}")
+async def get_page(presentation_id: str, page_id: str):
+    await _simulate("slides", "presentations.pages.get")
+    with _lock:
+        return _find_slide(_get_presentation(presentation_id), page_id)
+
+
+# Drive v3
+
+@app.post("/drive/v3/files/{file_id}/copy")
+async def copy_file(file_id: str, request: Request):
+    await _simulate("drive", "files.copy")
+    body = await request.json()
+    with _lock:
+        # Templates desconhecidos são criados na hora, para rodar sem preparação
+        source = _presentations.get(file_id) or {"slides": [_new_slide()]}
+        copy = _new_presentation(body.get("name", "Copy"))
+        copy["slides"] = [dict(slide, pageElements=list(slide["pageElements"])) for slide in source["slides"]]
+        return {"id": copy["presentationId"], "name": copy["title"]}
+
+
+@app.post("/drive/v3/files/{file_id}/permissions")
+async def create_permission(file_id: str, request: Request):
+    await _simulate("drive", "permissions.create")
+    body = await request.json()
+    return {"id": uuid.uuid4().hex[:12], "type": body.get("type"), "role": body.get("role")}
+
+
+@app.get("/drive/v3/files/{file_id}")
+async def get_file(file_id: str):
+    await _simulate("drive", "files.get")
+    with _lock:
+        if file_id not in _files:
+            raise EmulatorError(404, "NOT_FOUND", f"File not found: {file_id}")
+        return _files[file_id]
+
+
+@app.delete("/drive/v3/files/{file_id}")
+async def delete_file(file_id: str):
+    await _simulate("drive", "files.delete")
+    with _lock:
+        if _files.pop(file_id, None) is None:
+            raise EmulatorError(404, "NOT_FOUND", f"File not found: {file_id}")
+        _presentations.pop(file_id, None)
+    return Response(status_code=204)
+
+
+# Métricas do emulador
+
+@app.get("/_emulator/stats")
+async def get_stats():
+    with _lock:
+        return {
+            "calls": dict(_stats),
+            "batch_updates": len(_batch_sizes),
+            "requests_in_batches": sum(_batch_sizes),
+            "largest_batch": max(_batch_sizes, default=0),
+            "presentations": len(_presentations)
+        }
+
+
+@app.post("/_emulator/reset")
+async def reset():
+    with _lock:
+        _presentations.clear()
+        _files.clear()
+        _stats.clear()
+        _batch_sizes.clear()
+        _calls.clear()
+    return {"status": "ok"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=Config.GOOGLE_EMULATOR_PORT, log_level="info")
@@ -1,26 +1,339 @@
 import uuid
 import json
+import difflib
+import hashlib
 import os
 import logging
-import time
+import asyncio
+import select
+import functools
+import threading
+import contextvars
+import multiprocessing
+from http.client import RemoteDisconnected
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import List, Dict, Any
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
+import google_auth_httplib2
+import httplib2
 import pdfplumber
 from PIL import Image
 import io
-import base64
+from utils.cache_manager import SlidesCacheManager, get_slides_cache, get_deck_manifests
+from utils.asset_store import get_asset_store
+from utils.rate_limiter import call_with_backoff, get_rate_limiter
+from utils.cancellation import current_token
+from config import Config
 
 logger = logging.getLogger(__name__)
 
+SLIDES_SCOPE = 'https://www.googleapis.com/auth/presentations'
+DRIVE_SCOPE = 'https://www.googleapis.com/auth/drive'
+SERVICE_SCOPES = {
+    'slides': SLIDES_SCOPE,
+    'drive': DRIVE_SCOPE,
+}
+HTTP_TIMEOUT = 120  # seconds
+# Errors raised when reusing a keep-alive connection the server has already closed
+STALE_CONNECTION_ERRORS = (BrokenPipeError, ConnectionResetError, ConnectionAbortedError,
+                           RemoteDisconnected)
+# Methods that can be sent again after the connection dropped mid-request; a repeated
+# POST (files().copy, presentations().create) could create a duplicate file
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE", "OPTIONS")
+
+# Caminho de cada serviço a partir da URL base (usado com o emulador local)
+SERVICE_PATHS = {
+    'slides': '',
+    'drive': 'drive/v3/',
+}
+
+# Máximo de requests enviados em um único presentations.batchUpdate
+MAX_REQUESTS_PER_BATCH = 500
+# Tamanho máximo (JSON) do corpo de um batchUpdate
+MAX_BATCH_PAYLOAD_BYTES = 8 * 1024 * 1024
+
+# Os processos de renderização não podem nascer de um fork: o pool é criado a partir de
+# threads de trabalho enquanto outras threads (pool de templates, limpeza de caches,
+# asset store) podem estar segurando locks que o filho herdaria travados
+PDF_RENDER_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# Paginação e dimensionamento de tabelas (em pontos; o slide padrão tem 720 x 405)
+SLIDE_HEIGHT_PT = 405
+SLIDE_BOTTOM_MARGIN_PT = 15
+TABLE_ROW_HEIGHT_PT = 20
+TABLE_COLUMN_WIDTH_PT = 120
+TABLE_MAX_WIDTH_PT = 620
+TABLE_START_Y_PT = 200  # abaixo do título e do texto da página
+TABLE_CONTINUATION_Y_PT = 80  # abaixo do título do slide de continuação
+
+# Placeholders preenchidos em cada layout predefinido
+LAYOUT_PLACEHOLDERS = {
+    'TITLE_AND_BODY': ('TITLE', 'BODY'),
+    'TITLE_AND_TWO_COLUMNS': ('TITLE', 'BODY'),
+    'SECTION_HEADER': ('TITLE',),
+    'TITLE': ('TITLE',),
+    'TITLE_ONLY': ('TITLE',),
+    'BLANK': (),
+}
+
+def _rate_limited_request_class(limiter_name):
+    """
+    HttpRequest subclass whose execute() goes through the shared limiter and backoff.
+    429/5xx responses are always retried; network errors only for idempotent methods.
+
+    The request follows the cancellation token of the job running in the current context:
+    every attempt checks it and has its socket timeout capped at the time left until the
+    job's deadline, and backoff waits that would run past the deadline end the job
+    (JobCancelledError) instead.
+    """
+    class RateLimitedHttpRequest(HttpRequest):
+        def execute(self, http=None, num_retries=0):
+            token = current_token()
+            return call_with_backoff(
+                lambda: self._execute_reconnecting(http, num_retries, token),
+                limiter=get_rate_limiter(limiter_name),
+                max_retries=Config.API_MAX_RETRIES,
+                cancellation=token,
+                # A timed-out copy or create may have gone through; sending it again could
+                # leave an orphan duplicate
+                retry_transport_errors=self.method.upper() in IDEMPOTENT_METHODS
+            )
+
+        def _execute_reconnecting(self, http, num_retries, token):
+            http = http or self.http
+            _set_timeout(http, _request_timeout(token))
+            # The cached Http keeps its connections alive between calls; reconnect instead
+            # of writing the request to a connection the server has already closed
+            _close_dropped_connections(http)
+            try:
+                return HttpRequest.execute(self, http=http, num_retries=num_retries)
+            except STALE_CONNECTION_ERRORS as e:
+                # Dropped while the request was in flight: the server may have acted on it,
+                # so only idempotent requests are sent again on a new connection
+                _close_connections(http)
+                if self.method.upper() not in IDEMPOTENT_METHODS:
+                    raise
+                logger.info(f"Reconnecting to {self.uri.split('?')[0]} after {type(e).__name__}")
+                _set_timeout(http, _request_timeout(token))
+                return HttpRequest.execute(self, http=http, num_retries=num_retries)
+    return RateLimitedHttpRequest
+
+def _request_timeout(token) -> float:
+    """Socket timeout of a request: HTTP_TIMEOUT, capped at the time left until the job's deadline"""
+    if token is None:
+        return HTTP_TIMEOUT
+    token.check()
+    remaining = token.remaining()
+    # A zero timeout would make the socket non-blocking
+    return HTTP_TIMEOUT if remaining is None else max(0.1, min(HTTP_TIMEOUT, remaining))
+
+def _set_timeout(http, timeout: float) -> None:
+    # Each thread has its own Http (see get_service), so this only affects the current request
+    getattr(http, "http", http).timeout = timeout
+    for conn in _pooled_connections(http):
+        conn.timeout = timeout
+        if getattr(conn, "sock", None) is not None:
+            conn.sock.settimeout(timeout)
+
+def _pooled_connections(http) -> list:
+    """Keep-alive connections of an httplib2.Http, or of the one wrapped by AuthorizedHttp"""
+    return list(getattr(getattr(http, "http", http), "connections", {}).values())
+
+def _close_connections(http) -> None:
+    # Closed connections stay in the pool; httplib2 reconnects them on the next request
+    for conn in _pooled_connections(http):
+        conn.close()
+
+def _close_dropped_connections(http) -> None:
+    """Close the pooled connections the server has closed (an idle socket that is readable)"""
+    for conn in _pooled_connections(http):
+        sock = getattr(conn, "sock", None)
+        if sock is None:
+            continue
+        try:
+            dropped = sock.fileno() < 0 or bool(select.select([sock], [], [], 0)[0])
+        except (OSError, ValueError):
+            dropped = True
+        if dropped:
+            conn.close()
+
+_credentials_cache = {}
+_credentials_lock = threading.Lock()
+_thread_local = threading.local()
+
+def _get_credentials(credentials, scopes):
+    """Load service-account credentials once per (file, scopes) for the whole process"""
+    key = (credentials, tuple(scopes))
+    with _credentials_lock:
+        if key not in _credentials_cache:
+            _credentials_cache[key] = service_account.Credentials.from_service_account_file(
+                credentials, scopes=list(scopes)
+            )
+        return _credentials_cache[key]
+
 def get_service(credentials, scopes, service_build, service_version):
-    creds = service_account.Credentials.from_service_account_file(
-        credentials, scopes=[scopes] if isinstance(scopes, str) else scopes
-    )
-    return build(service_build, service_version, credentials=creds)
+    """
+    Return a cached Google API client.
+
+    googleapiclient services are not thread-safe, so each thread keeps its own
+    instance (and its own pooled httplib2 connection), built once from the bundled
+    discovery document and the process-wide credentials.
+    """
+    scopes = (scopes,) if isinstance(scopes, str) else tuple(scopes)
+    key = (credentials, scopes, service_build, service_version)
+    services = getattr(_thread_local, 'services', None)
+    if services is None:
+        services = _thread_local.services = {}
+    if key not in services:
+        client_options = None
+        if Config.GOOGLE_API_EMULATOR_URL:
+            # O emulador local não exige credenciais
+            http = httplib2.Http(timeout=HTTP_TIMEOUT)
+            client_options = {"api_endpoint": f"{Config.GOOGLE_API_EMULATOR_URL.rstrip('/')}/{SERVICE_PATHS[service_build]}"}
+        else:
+            creds = _get_credentials(credentials, scopes)
+            http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+        services[key] = build(
+            service_build, service_version,
+            http=http,
+            requestBuilder=_rate_limited_request_class(service_build),
+            client_options=client_options,
+            cache_discovery=False,
+            static_discovery=True
+        )
+    return services[key]
+
+def _page_image_crops(page, resolution: int) -> List[bytes]:
+    """
+    PNG de cada imagem da página, recortados de uma única rasterização.
+
+    As coordenadas do pdfplumber estão em pontos (72 por polegada) e precisam ser
+    escaladas para a resolução do render antes do recorte.
+    """
+    if not page.images:
+        return []
+    rendered = page.to_image(resolution=resolution).original
+    scale = resolution / 72
+    crops = []
+    try:
+        for img in page.images:
+            box = tuple(round(coord * scale) for coord in (img["x0"], img["top"], img["x1"], img["bottom"]))
+            buffered = io.BytesIO()
+            rendered.crop(box).save(buffered, format="PNG")
+            crops.append(buffered.getvalue())
+    finally:
+        rendered.close()
+    return crops
+
+def _plan_pdf_page(page, idx: int, resolution: int) -> List[Dict[str, Any]]:
+    """Requests que recriam uma página do PDF: slide em branco, caixa de texto e imagens"""
+    slide_id = f"slide_{uuid.uuid4().hex[:8]}"
+    # Cria slide em branco
+    requests = [{
+        "createSlide": {
+            "objectId": slide_id,
+            "insertionIndex": idx,
+            "slideLayoutReference": {"predefinedLayout": "BLANK"}
+        }
+    }]
+
+    # Extrai texto
+    text = page.extract_text() or ""
+    if text.strip():
+        # Adiciona caixa de texto centralizada
+        text_box_id = f"{slide_id}_text"
+        requests.extend([
+            {
+                "createShape": {
+                    "objectId": text_box_id,
+                    "shapeType": "TEXT_BOX",
+                    "elementProperties": {
+                        "pageObjectId": slide_id,
+                        "size": {"height": {"magnitude": 300, "unit": "PT"}, "width": {"magnitude": 600, "unit": "PT"}},
+                        "transform": {
+                            "scaleX": 1, "scaleY": 1, "translateX": 50, "translateY": 100, "unit": "PT"
+                        }
+                    }
+                }
+            },
+            {
+                "insertText": {
+                    "objectId": text_box_id,
+                    "insertionIndex": 0,
+                    "text": text
+                }
+            }
+        ])
+
+    # Extrai imagens (a página é rasterizada uma única vez); os requests levam só a URL do asset
+    asset_store = get_asset_store()
+    for img_idx, png in enumerate(_page_image_crops(page, resolution)):
+        image_url = asset_store.put(png, "image/png")
+        requests.append({
+            "createImage": {
+                "objectId": f"{slide_id}_img_{img_idx}",
+                "url": image_url,
+                "elementProperties": {
+                    "pageObjectId": slide_id,
+                    "size": {"height": {"magnitude": 200, "unit": "PT"}, "width": {"magnitude": 300, "unit": "PT"}},
+                    "transform": {
+                        "scaleX": 1, "scaleY": 1, "translateX": 100 + img_idx*320, "translateY": 420, "unit": "PT"
+                    }
+                }
+            }
+        })
+
+    return requests
+
+def _plan_pdf_page_range(pdf_path: str, page_range: range, resolution: int) -> List[List[Dict[str, Any]]]:
+    """Planeja uma faixa de páginas; roda em um processo do pool, com seu próprio handle do PDF"""
+    with pdfplumber.open(pdf_path) as pdf:
+        plans = []
+        for idx in page_range:
+            page = pdf.pages[idx]
+            plans.append(_plan_pdf_page(page, idx, resolution))
+            # Libera os objetos já parseados da página antes da próxima
+            page.flush_cache()
+        return plans
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+def _get_render_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Pool de processos de renderização compartilhado pelo processo inteiro.
+
+    Criado no primeiro uso e mantido até shutdown_render_pool(), para que cada PDF não
+    pague a criação dos processos e a importação do pdfplumber e do PIL em cada filho.
+    """
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(max_workers=workers,
+                                               mp_context=multiprocessing.get_context(PDF_RENDER_START_METHOD))
+        return _render_pool
+
+def _discard_render_pool(pool: ProcessPoolExecutor) -> None:
+    """Descarta um pool quebrado (um filho morreu); o próximo uso cria outro"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is pool:
+            _render_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_render_pool() -> None:
+    """Encerra os processos de renderização (no desligamento do servidor)"""
+    global _render_pool
+    with _render_pool_lock:
+        pool, _render_pool = _render_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
 
 class GoogleSlidesClient:
-    def __init__(self, credentials_path, template_presentation_id):
+    def __init__(self, credentials_path, template_presentation_id, slides_cache: SlidesCacheManager = None):
         # Adiciona checagem para evitar uso do client_id como template_id
         if template_presentation_id and len(template_presentation_id) < 30:
             raise ValueError("O template_presentation_id parece inválido. Use o ID de uma apresentação do Google Slides, não o client_id das credenciais.")
@@ -28,30 +341,53 @@ class GoogleSlidesClient:
             raise ValueError("Você deve fornecer um template_presentation_id válido ao instanciar GoogleSlidesClient.")
         self.credentials = credentials_path
         self.template_presentation_id = template_presentation_id
-        # Inicializa os serviços Google Slides e Drive
-        self.service = get_service(
-            credentials=self.credentials,
-            scopes='https://www.googleapis.com/auth/presentations',
-            service_build='slides',
-            service_version='v1'
-        )
-        self.drive_service = get_service(
+        self.slides_cache = slides_cache if slides_cache is not None else get_slides_cache()
+        # Pool opcional de cópias prontas do template (ver utils.template_pool)
+        self.template_pool = None
+        # Inicializa os serviços Google Slides e Drive da thread atual (valida as credenciais)
+        self._get_service('slides', 'v1')
+        self._get_service('drive', 'v3')
+
+    @property
+    def service(self):
+        """Serviço do Google Slides da thread atual"""
+        return self._get_service('slides', 'v1')
+
+    @property
+    def drive_service(self):
+        """Serviço do Google Drive da thread atual"""
+        return self._get_service('drive', 'v3')
+
+    def _get_service(self, service_build, service_version):
+        return get_service(
             credentials=self.credentials,
-            scopes='https://www.googleapis.com/auth/drive',
-            service_build='drive',
-            service_version='v3'
+            scopes=SERVICE_SCOPES[service_build],
+            service_build=service_build,
+            service_version=service_version
         )
 
+    def get_template_version(self) -> str:
+        """Versão atual do template no Drive; muda a cada edição"""
+        return self.drive_service.files().get(
+            fileId=self.template_presentation_id,
+            fields="version"
+        ).execute()["version"]
+
     def create_new_slide_by_template(self):
         if not self.template_presentation_id:
             raise ValueError("template_presentation_id não definido. Defina um ID de template válido ao instanciar GoogleSlidesClient.")
+        # Usa uma cópia pré-criada do pool, se houver
+        if self.template_pool is not None:
+            new_presentation_id = self.template_pool.acquire()
+            if new_presentation_id:
+                logger.info(f"Using pooled template copy {new_presentation_id}")
+                return new_presentation_id
+        return self.copy_template()
+
+    def copy_template(self):
+        """Copia o template no Drive e libera o acesso por link"""
         name_new_presentation = str(uuid.uuid4())
-        drive_service = get_service(
-            credentials=self.credentials,
-            scopes='https://www.googleapis.com/auth/drive',
-            service_build='drive',
-            service_version='v3'
-        )
+        drive_service = self.drive_service
         dict_new_presentation = {"name": name_new_presentation}
         print(f"Copying template {self.template_presentation_id} and creating new the presentation {name_new_presentation}")
         new_presentation_id = drive_service.files().copy(body=dict_new_presentation, fileId=self.template_presentation_id).execute()['id']
@@ -68,12 +404,7 @@ class GoogleSlidesClient:
         return new_presentation_id
 
     def text_replace(self, key: str, replace_text: str, presentation_id: str, pages: list = []):
-        service = get_service(
-            credentials=self.credentials,
-            scopes='https://www.googleapis.com/auth/presentations',
-            service_build='slides',
-            service_version='v1'
-        )
+        service = self.service
         service.presentations().batchUpdate(
             body={
                 "requests": [
@@ -92,12 +423,7 @@ class GoogleSlidesClient:
         ).execute()
 
     def replace_shape_with_image(self, url: str, presentation_id: str, key: str = None, pages: list = []):
-        service = get_service(
-            credentials=self.credentials,
-            scopes='https://www.googleapis.com/auth/presentations',
-            service_build='slides',
-            service_version='v1'
-        )
+        service = self.service
         service.presentations().batchUpdate(
             body={
                 "requests": [
@@ -117,12 +443,7 @@ class GoogleSlidesClient:
         ).execute()
 
     def duplicate_slide(self, presentation_id: str, page_id: str, new_page_ids: list):
-        service = get_service(
-            credentials=self.credentials,
-            scopes='https://www.googleapis.com/auth/presentations',
-            service_build='slides',
-            service_version='v1'
-        )
+        service = self.service
         requests = []
         for id in new_page_ids[::-1]:
             obj = {page_id: id}
@@ -132,12 +453,7 @@ class GoogleSlidesClient:
         service.presentations().batchUpdate(presentationId=presentation_id, body={'requests': requests}).execute()
 
     def move_slide(self, presentation_id: str, num_page_target: str, list_page_id_to_move: list):
-        service = get_service(
-            credentials=self.credentials,
-            scopes='https://www.googleapis.com/auth/presentations',
-            service_build='slides',
-            service_version='v1'
-        )
+        service = self.service
         requests = []
         requests.append({
             "updateSlidesPosition": {
@@ -148,12 +464,7 @@ class GoogleSlidesClient:
         service.presentations().batchUpdate(presentationId=presentation_id, body={'requests': requests}).execute()
 
     def add_speaker_notes(self, presentation_id: str, slide_id: str, speaker_notes_text: str):
-        service = get_service(
-            credentials=self.credentials,
-            scopes='https://www.googleapis.com/auth/presentations',
-            service_build='slides',
-            service_version='v1'
-        )
+        service = self.service
         presentation = service.presentations().get(presentationId=presentation_id).execute()
         slides = presentation.get('slides')
         speaker_notes_id = None
@@ -187,12 +498,7 @@ class GoogleSlidesClient:
         # Cria nova apresentação a partir do template
         presentation_id = self.create_new_slide_by_template()
 
-        service = get_service(
-            credentials=self.credentials,
-            scopes='https://www.googleapis.com/auth/presentations',
-            service_build='slides',
-            service_version='v1'
-        )
+        service = self.service
 
         # Recupera slides existentes (para saber o id do slide inicial)
         presentation = service.presentations().get(presentationId=presentation_id).execute()
@@ -285,31 +591,39 @@ class GoogleSlidesClient:
             body={'requests': requests}
         ).execute()
 
-    def _batch_requests(self, presentation_id: str, requests: List[Dict[str, Any]], batch_size: int = 10) -> None:
-        """Execute requests in batches with rate limiting"""
-        for i in range(0, len(requests), batch_size):
-            batch = requests[i:i + batch_size]
-            retries = 3
-            while retries > 0:
-                try:
-                    self.service.presentations().batchUpdate(
-                        presentationId=presentation_id,
-                        body={"requests": batch}
-                    ).execute()
-                    # Wait 1.5 seconds between batches to stay under rate limit
-                    time.sleep(1.5)
-                    break
-                except Exception as e:
-                    if 'RATE_LIMIT_EXCEEDED' in str(e) and retries > 1:
-                        wait_time = (4 - retries) * 2  # Progressive backoff
-                        logger.warning(f"Rate limit hit, waiting {wait_time} seconds...")
-                        time.sleep(wait_time)
-                        retries -= 1
-                    else:
-                        raise
-
-    def create_slides_from_json(self, json_data):
-        """Cria slides no Google Slides com base no conteúdo do JSON."""
+    def _batch_requests(self, presentation_id: str, requests: List[Dict[str, Any]], batch_size: int = 10,
+                        max_bytes: int = MAX_BATCH_PAYLOAD_BYTES) -> None:
+        """Execute requests in batches; pacing and retries come from the shared rate limiter"""
+        for batch in self._split_batches(requests, batch_size, max_bytes):
+            self.service.presentations().batchUpdate(
+                presentationId=presentation_id,
+                body={"requests": batch}
+            ).execute()
+
+    @staticmethod
+    def _split_batches(requests: List[Dict[str, Any]], batch_size: int, max_bytes: int):
+        """Split requests in order into batches bounded by request count and JSON payload size"""
+        batch = []
+        batch_bytes = 0
+        for request in requests:
+            request_bytes = len(json.dumps(request, ensure_ascii=False).encode("utf-8"))
+            if batch and (len(batch) >= batch_size or batch_bytes + request_bytes > max_bytes):
+                yield batch
+                batch = []
+                batch_bytes = 0
+            batch.append(request)
+            batch_bytes += request_bytes
+        if batch:
+            yield batch
+
+    def create_slides_from_json(self, json_data, deck_key: str = None):
+        """
+        Cria slides no Google Slides com base no conteúdo do JSON.
+
+        Com deck_key, a apresentação gerada fica associada à chave: chamadas seguintes
+        com a mesma chave atualizam essa apresentação, alterando apenas as seções que
+        mudaram (ver _sync_deck).
+        """
         try:
             # Garantir que json_data seja um objeto Python
             if isinstance(json_data, str):
@@ -327,64 +641,43 @@ class GoogleSlidesClient:
             # Converter para lista se for dicionário
             if isinstance(data, dict):
                 data = [data]
+
+            # Atualizar incrementalmente a apresentação já associada à chave
+            if deck_key:
+                manifest = self._load_manifest(deck_key, "sections")
+                if manifest:
+                    self._update_deck(deck_key, manifest, data, self._plan_section_entry, base_index=1)
+                    return manifest["presentation_id"]
+
+            # Reutilizar a apresentação já gerada para um payload idêntico; decks com
+            # deck_key são alterados depois, então não são compartilhados pelo cache
+            cache_key = None
+            if self.slides_cache and not deck_key:
+                cache_key = self.slides_cache.get_cache_key(
+                    {"template": self.template_presentation_id, "sections": data})
+                cached = self.slides_cache.get_cached_slides(cache_key)
+                if cached and self._presentation_exists(cached["presentation_id"]):
+                    logger.info(f"Reutilizando apresentação em cache: {cached['presentation_id']}")
+                    return cached["presentation_id"]
                 
             presentation_id = self.create_new_slide_by_template()
-            
-            # First batch: Create all slides
-            create_requests = []
-            slide_ids = []  # Store slide IDs for later use
-            
+
+            # Planejar todas as seções: os IDs dos slides e placeholders são definidos
+            # aqui, então criação e textos seguem juntos nos mesmos batchUpdate
+            requests = []
+            entries = []
             for index, section in enumerate(data):
-                slide_id = f"slide_{uuid.uuid4().hex[:8]}"
-                slide_ids.append(slide_id)
-                layout = self._determine_layout(section)
-                
-                create_requests.append({
-                    "createSlide": {
-                        "objectId": slide_id,
-                        "insertionIndex": index + 1,  # +1 to skip title slide
-                        "slideLayoutReference": {"predefinedLayout": layout}
-                    }
-                })
-            
-            # Execute slide creation requests
-            if create_requests:
-                self._batch_requests(presentation_id, create_requests)
-                
-            # Second batch: Get slide details and insert text
-            for slide_id, section in zip(slide_ids, data):
-                # Get slide details to find element IDs
-                slide = self.service.presentations().pages().get(
-                    presentationId=presentation_id,
-                    pageObjectId=slide_id
-                ).execute()
-                
-                text_requests = []
-                
-                # Find title and body elements
-                for element in slide.get('pageElements', []):
-                    if 'shape' in element and 'objectId' in element:
-                        shape_type = element['shape'].get('shapeType', '')
-                        element_id = element['objectId']
-                        
-                        if shape_type == 'TITLE' and section.get('title'):
-                            text_requests.append({
-                                'insertText': {
-                                    'objectId': element_id,
-                                    'text': section['title']
-                                }
-                            })
-                        elif shape_type in ['BODY', 'TEXT_BOX'] and section.get('content'):
-                            text_requests.append({
-                                'insertText': {
-                                    'objectId': element_id,
-                                    'text': self._format_content(section['content'])
-                                }
-                            })
-                
-                # Execute text insertion requests for this slide
-                if text_requests:
-                    self._batch_requests(presentation_id, text_requests)
+                section_requests, slide_ids = self._plan_section_entry(section, index + 1)  # +1 to skip title slide
+                requests.extend(section_requests)
+                entries.append({"hash": self._content_hash(section), "slide_ids": slide_ids})
+
+            if requests:
+                self._batch_requests(presentation_id, requests, batch_size=MAX_REQUESTS_PER_BATCH)
+
+            if deck_key:
+                self._save_manifest(deck_key, "sections", presentation_id, entries)
+            if cache_key:
+                self.slides_cache.cache_slides(cache_key, {"presentation_id": presentation_id})
             
             return presentation_id
             
@@ -392,6 +685,132 @@ class GoogleSlidesClient:
             logger.error(f"Erro ao criar slides: {str(e)}")
             raise
 
+    def _presentation_exists(self, presentation_id: str) -> bool:
+        """Verifica se uma apresentação ainda existe e não está na lixeira"""
+        try:
+            file_info = self.drive_service.files().get(
+                fileId=presentation_id,
+                fields="id,trashed"
+            ).execute()
+            return not file_info.get("trashed", False)
+        except Exception as e:
+            logger.warning(f"Apresentação em cache indisponível ({presentation_id}): {str(e)}")
+            return False
+
+    @staticmethod
+    def _content_hash(item) -> str:
+        """Hash estável do conteúdo de uma seção ou página"""
+        payload = json.dumps(item, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _load_manifest(self, deck_key: str, kind: str):
+        """Manifesto da apresentação associada à chave, se ainda for utilizável"""
+        manifest = get_deck_manifests().get_manifest(deck_key)
+        if not manifest or manifest.get("kind") != kind or manifest.get("template") != self.template_presentation_id:
+            return None
+        if not self._presentation_exists(manifest["presentation_id"]):
+            return None
+        return manifest
+
+    def _save_manifest(self, deck_key: str, kind: str, presentation_id: str, entries: list) -> None:
+        get_deck_manifests().save_manifest(deck_key, {
+            "kind": kind,
+            "template": self.template_presentation_id,
+            "presentation_id": presentation_id,
+            "entries": entries
+        })
+
+    def _update_deck(self, deck_key: str, manifest: dict, items: list, plan_item, base_index: int = 0) -> int:
+        """
+        Aplica a uma apresentação existente apenas as diferenças entre o manifesto e os
+        novos itens, comparando os hashes com difflib: slides de itens inalterados são
+        mantidos, os de itens removidos ou alterados são apagados e os novos são criados
+        na posição final. Retorna o número de requests enviados.
+        """
+        old_entries = manifest["entries"]
+        new_hashes = [self._content_hash(item) for item in items]
+        matcher = difflib.SequenceMatcher(a=[entry["hash"] for entry in old_entries], b=new_hashes, autojunk=False)
+
+        requests = []
+        entries = [None] * len(items)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                entries[j1:j2] = old_entries[i1:i2]
+                continue
+            for entry in old_entries[i1:i2]:
+                requests.extend({"deleteObject": {"objectId": slide_id}} for slide_id in entry["slide_ids"])
+
+        # Depois das remoções, os slides mantidos já estão na ordem final; os novos são
+        # inseridos em ordem crescente de posição
+        position = base_index
+        for j, item in enumerate(items):
+            if entries[j] is None:
+                item_requests, slide_ids = plan_item(item, position)
+                requests.extend(item_requests)
+                entries[j] = {"hash": new_hashes[j], "slide_ids": slide_ids}
+            position += len(entries[j]["slide_ids"])
+
+        presentation_id = manifest["presentation_id"]
+        if requests:
+            self._batch_requests(presentation_id, requests, batch_size=MAX_REQUESTS_PER_BATCH)
+        self._save_manifest(deck_key, manifest["kind"], presentation_id, entries)
+        logger.info(f"Apresentação {presentation_id} atualizada com {len(requests)} requests")
+        return len(requests)
+
+    def _plan_section_entry(self, section, insertion_index):
+        plan = self._plan_section_slide(section, insertion_index)
+        return plan['requests'], [plan['slide_id']]
+
+    def _plan_section_slide(self, section, insertion_index):
+        """
+        Monta os requests de uma seção: createSlide com placeholderIdMappings, para que
+        os IDs do título e do corpo sejam conhecidos sem consultar o slide, seguido dos
+        insertText correspondentes.
+        """
+        slide_id = f"slide_{uuid.uuid4().hex[:8]}"
+        layout = self._determine_layout(section)
+        placeholders = LAYOUT_PLACEHOLDERS.get(layout, ())
+
+        mappings = []
+        text_requests = []
+        elements = {}
+        for placeholder_type, text in (
+            ('TITLE', section.get('title')),
+            ('BODY', self._format_content(section['content']) if section.get('content') else None),
+        ):
+            if placeholder_type not in placeholders:
+                continue
+            element_id = f"{slide_id}_{placeholder_type.lower()}"
+            elements[placeholder_type] = element_id
+            mappings.append({
+                "layoutPlaceholder": {"type": placeholder_type, "index": 0},
+                "objectId": element_id
+            })
+            if text:
+                text_requests.append({
+                    'insertText': {
+                        'objectId': element_id,
+                        'text': text
+                    }
+                })
+
+        create_request = {
+            "createSlide": {
+                "objectId": slide_id,
+                "insertionIndex": insertion_index,
+                "slideLayoutReference": {"predefinedLayout": layout}
+            }
+        }
+        if mappings:
+            create_request["createSlide"]["placeholderIdMappings"] = mappings
+
+        return {
+            "slide_id": slide_id,
+            "layout": layout,
+            "elements": elements,
+            "requests": [create_request] + text_requests
+        }
+
     def _determine_layout(self, section):
         """Determina o melhor layout baseado no conteúdo da seção"""
         if not section.get("title") and not section.get("content"):
@@ -400,7 +819,10 @@ class GoogleSlidesClient:
             return "TITLE_AND_BODY"
         if section.get("images"):
             return "TITLE_AND_TWO_COLUMNS"
-        return "SECTION_HEADER"  # Default
+        if section.get("content"):
+            return "TITLE_AND_BODY"
+        # SECTION_HEADER só tem o placeholder do título
+        return "SECTION_HEADER"
 
     def _format_content(self, content):
         """Formata o conteúdo para apresentação"""
@@ -541,6 +963,9 @@ class GoogleSlidesClient:
     def create_presentation_from_pdf(self, pdf_path: str) -> str:
         """
         Cria uma apresentação no Google Slides replicando cada página do PDF como um slide.
+
+        As páginas são extraídas em paralelo e cada uma vira uma lista de requests;
+        a apresentação inteira é então enviada em poucos batchUpdate.
         """
         slides_service = self._get_service('slides', 'v1')
         drive_service = self._get_service('drive', 'v3')
@@ -549,163 +974,183 @@ class GoogleSlidesClient:
         presentation = slides_service.presentations().create(
             body={'title': f"Apresentação PDF - {uuid.uuid4()}"}
         ).execute()
+        presentation_id = presentation['presentationId']
 
         # Permite acesso por link
         drive_service.permissions().create(
-            fileId=presentation['presentationId'],
+            fileId=presentation_id,
             body={'type': 'anyone', 'role': 'reader'}
         ).execute()
 
-        # Remove slide inicial em branco
+        # Remove slide inicial em branco junto com o primeiro lote
         first_slide_id = presentation['slides'][0]['objectId']
-        slides_service.presentations().batchUpdate(
-            presentationId=presentation['presentationId'],
-            body={'requests': [{'deleteObject': {'objectId': first_slide_id}}]}
-        ).execute()
+        requests = [{'deleteObject': {'objectId': first_slide_id}}]
+        for page_requests in self._plan_pdf_pages(pdf_path):
+            requests.extend(page_requests)
 
+        self._batch_requests(presentation_id, requests, batch_size=MAX_REQUESTS_PER_BATCH)
+        return presentation_id
+
+    def _plan_pdf_pages(self, pdf_path: str) -> List[List[Dict[str, Any]]]:
+        """
+        Requests de cada página do PDF, em ordem. PDFs grandes são extraídos em paralelo,
+        por faixas de páginas, no pool de processos compartilhado; PDFs pequenos (ou
+        PDF_PAGE_WORKERS <= 1, ou uma única CPU) são extraídos em série, neste processo.
+        """
         with pdfplumber.open(pdf_path) as pdf:
-            for idx, page in enumerate(pdf.pages):
-                slide_id = f"slide_{uuid.uuid4().hex[:8]}"
-                # Cria slide em branco
-                slides_service.presentations().batchUpdate(
-                    presentationId=presentation['presentationId'],
-                    body={'requests': [{
-                        "createSlide": {
-                            "objectId": slide_id,
-                            "insertionIndex": idx,
-                            "slideLayoutReference": {"predefinedLayout": "BLANK"}
-                        }
-                    }]}
-                ).execute()
-
-                # Extrai texto
-                text = page.extract_text() or ""
-                if text.strip():
-                    # Adiciona caixa de texto centralizada
-                    text_box_id = f"{slide_id}_text"
-                    slides_service.presentations().batchUpdate(
-                        presentationId=presentation['presentationId'],
-                        body={'requests': [
-                            {
-                                "createShape": {
-                                    "objectId": text_box_id,
-                                    "shapeType": "TEXT_BOX",
-                                    "elementProperties": {
-                                        "pageObjectId": slide_id,
-                                        "size": {"height": {"magnitude": 300, "unit": "PT"}, "width": {"magnitude": 600, "unit": "PT"}},
-                                        "transform": {
-                                            "scaleX": 1, "scaleY": 1, "translateX": 50, "translateY": 100, "unit": "PT"
-                                        }
-                                    }
-                                }
-                            },
-                            {
-                                "insertText": {
-                                    "objectId": text_box_id,
-                                    "insertionIndex": 0,
-                                    "text": text
-                                }
-                            }
-                        ]}
-                    ).execute()
-
-                # Extrai imagens
-                for img_idx, img in enumerate(page.images):
-                    x0, top, x1, bottom = img["x0"], img["top"], img["x1"], img["bottom"]
-                    # Recorta imagem da página
-                    pil_img = page.to_image(resolution=200).original.crop((x0, top, x1, bottom))
-                    buffered = io.BytesIO()
-                    pil_img.save(buffered, format="PNG")
-                    img_b64 = base64.b64encode(buffered.getvalue()).decode()
-                    image_url = f"data:image/png;base64,{img_b64}"
-
-                    image_id = f"{slide_id}_img_{img_idx}"
-                    slides_service.presentations().batchUpdate(
-                        presentationId=presentation['presentationId'],
-                        body={'requests': [
-                            {
-                                "createImage": {
-                                    "objectId": image_id,
-                                    "url": image_url,
-                                    "elementProperties": {
-                                        "pageObjectId": slide_id,
-                                        "size": {"height": {"magnitude": 200, "unit": "PT"}, "width": {"magnitude": 300, "unit": "PT"}},
-                                        "transform": {
-                                            "scaleX": 1, "scaleY": 1, "translateX": 100 + img_idx*320, "translateY": 420, "unit": "PT"
-                                        }
-                                    }
-                                }
-                            }
-                        ]}
-                    ).execute()
+            total_pages = len(pdf.pages)
+        if total_pages == 0:
+            return []
 
-        return presentation['presentationId']
+        workers = min(Config.PDF_PAGE_WORKERS, os.cpu_count() or 1)
+        if workers <= 1 or total_pages < Config.PDF_PARALLEL_MIN_PAGES:
+            return _plan_pdf_page_range(pdf_path, range(total_pages), Config.PDF_RENDER_RESOLUTION)
+
+        range_size = -(-total_pages // workers)
+        ranges = [range(start, min(start + range_size, total_pages))
+                  for start in range(0, total_pages, range_size)]
+
+        # A rasterização é CPU-bound, então cada faixa roda em um processo do pool
+        pool = _get_render_pool(workers)
+        try:
+            futures = [
+                pool.submit(_plan_pdf_page_range, pdf_path, page_range, Config.PDF_RENDER_RESOLUTION)
+                for page_range in ranges
+            ]
+            return [page_requests for future in futures for page_requests in future.result()]
+        except BrokenProcessPool:
+            _discard_render_pool(pool)
+            raise
+
+    @staticmethod
+    def _table_rows_per_slide(start_y, com_cabecalho):
+        """Linhas de dados que cabem no slide a partir de start_y, descontado o cabeçalho"""
+        linhas = (SLIDE_HEIGHT_PT - start_y - SLIDE_BOTTOM_MARGIN_PT) // TABLE_ROW_HEIGHT_PT
+        return max(1, linhas - (1 if com_cabecalho else 0))
 
-    def _create_table_on_slide(self, slides_service, presentation_id, slide_id, tabela, start_x=100, start_y=200):
+    def _plan_table(self, slide_id, tabela, linhas, start_x=100, start_y=TABLE_START_Y_PT):
         """
-        Cria uma tabela real no slide usando os dados do dicionário 'tabela'.
+        Requests que criam uma tabela no slide e preenchem suas células, dimensionada
+        pelo número de linhas e colunas. Células vazias não geram insertText.
         """
-        rows = len(tabela.get("linhas", [])) + (1 if tabela.get("cabecalho") else 0)
-        cols = len(tabela.get("cabecalho", []))
+        cabecalho = tabela.get("cabecalho") or []
+        cols = len(cabecalho) or max((len(linha) for linha in linhas), default=0)
+        rows = len(linhas) + (1 if cabecalho else 0)
         if rows == 0 or cols == 0:
-            return
+            return []
 
         table_id = f"{slide_id}_table_{uuid.uuid4().hex[:6]}"
-        # Cria a tabela
-        slides_service.presentations().batchUpdate(
-            presentationId=presentation_id,
-            body={'requests': [{
-                "createTable": {
-                    "objectId": table_id,
-                    "elementProperties": {
-                        "pageObjectId": slide_id,
-                        "size": {
-                            "height": {"magnitude": 150, "unit": "PT"},
-                            "width": {"magnitude": 400, "unit": "PT"}
-                        },
-                        "transform": {
-                            "scaleX": 1, "scaleY": 1,
-                            "translateX": start_x, "translateY": start_y, "unit": "PT"
-                        }
+        width = min(TABLE_MAX_WIDTH_PT, cols * TABLE_COLUMN_WIDTH_PT)
+        requests = [{
+            "createTable": {
+                "objectId": table_id,
+                "elementProperties": {
+                    "pageObjectId": slide_id,
+                    "size": {
+                        "height": {"magnitude": rows * TABLE_ROW_HEIGHT_PT, "unit": "PT"},
+                        "width": {"magnitude": width, "unit": "PT"}
                     },
-                    "rows": rows,
-                    "columns": cols
-                }
-            }]}
-        ).execute()
+                    "transform": {
+                        "scaleX": 1, "scaleY": 1,
+                        "translateX": start_x, "translateY": start_y, "unit": "PT"
+                    }
+                },
+                "rows": rows,
+                "columns": cols
+            }
+        }]
 
-        # Preenche cabeçalho
-        requests = []
-        if tabela.get("cabecalho"):
-            for col, valor in enumerate(tabela["cabecalho"]):
+        celulas = ([cabecalho] if cabecalho else []) + list(linhas)
+        for row, linha in enumerate(celulas):
+            for col, valor in enumerate(linha[:cols]):
+                if valor is None or str(valor) == "":
+                    continue
                 requests.append({
                     "insertText": {
                         "objectId": table_id,
-                        "cellLocation": {"rowIndex": 0, "columnIndex": col},
+                        "cellLocation": {"rowIndex": row, "columnIndex": col},
                         "text": str(valor)
                     }
                 })
-        # Preenche linhas
-        for row, linha in enumerate(tabela.get("linhas", [])):
-            for col, valor in enumerate(linha):
+        return requests
+
+    def _plan_structured_page(self, pagina, insertion_index):
+        """
+        Monta os requests de uma página do JSON estruturado. Tabelas com mais linhas
+        do que cabem até o fim do slide continuam em slides seguintes, repetindo o
+        cabeçalho. Retorna os requests e os IDs dos slides criados, em ordem.
+        """
+        slide_id = f"slide_{uuid.uuid4().hex[:8]}"
+        layout = "TITLE_AND_BODY" if pagina.get("texto") else "TITLE"
+        title_id = f"{slide_id}_title"
+        body_id = f"{slide_id}_body"
+
+        # No layout TITLE o placeholder do título é do tipo CENTERED_TITLE
+        title_type = "CENTERED_TITLE" if layout == "TITLE" else "TITLE"
+        mappings = [{"layoutPlaceholder": {"type": title_type, "index": 0}, "objectId": title_id}]
+        if layout == "TITLE_AND_BODY":
+            mappings.append({"layoutPlaceholder": {"type": "BODY", "index": 0}, "objectId": body_id})
+        requests = [{
+            "createSlide": {
+                "objectId": slide_id,
+                "insertionIndex": insertion_index,
+                "slideLayoutReference": {"predefinedLayout": layout},
+                "placeholderIdMappings": mappings
+            }
+        }]
+
+        # Insere título e texto
+        if pagina.get("titulo"):
+            requests.append({"insertText": {"objectId": title_id, "insertionIndex": 0, "text": pagina["titulo"]}})
+        if pagina.get("texto"):
+            requests.append({"insertText": {"objectId": body_id, "insertionIndex": 0, "text": pagina["texto"]}})
+
+        # Insere tabelas reais; a primeira parte de cada tabela fica no slide da página
+        slide_ids = [slide_id]
+        for tabela in pagina.get("tabelas") or []:
+            linhas = tabela.get("linhas", [])
+            com_cabecalho = bool(tabela.get("cabecalho"))
+            primeira = self._table_rows_per_slide(TABLE_START_Y_PT, com_cabecalho)
+            seguintes = self._table_rows_per_slide(TABLE_CONTINUATION_Y_PT, com_cabecalho)
+            partes = [linhas[:primeira]] + [linhas[i:i + seguintes]
+                                            for i in range(primeira, len(linhas), seguintes)]
+            requests.extend(self._plan_table(slide_id, tabela, partes[0]))
+            for parte in partes[1:]:
+                continuation_id = f"slide_{uuid.uuid4().hex[:8]}"
+                continuation_title_id = f"{continuation_id}_title"
                 requests.append({
-                    "insertText": {
-                        "objectId": table_id,
-                        "cellLocation": {"rowIndex": row + (1 if tabela.get("cabecalho") else 0), "columnIndex": col},
-                        "text": str(valor)
+                    "createSlide": {
+                        "objectId": continuation_id,
+                        "insertionIndex": insertion_index + len(slide_ids),
+                        "slideLayoutReference": {"predefinedLayout": "TITLE_ONLY"},
+                        "placeholderIdMappings": [{
+                            "layoutPlaceholder": {"type": "TITLE", "index": 0},
+                            "objectId": continuation_title_id
+                        }]
                     }
                 })
-        if requests:
-            slides_service.presentations().batchUpdate(
-                presentationId=presentation_id,
-                body={'requests': requests}
-            ).execute()
+                requests.append({"insertText": {
+                    "objectId": continuation_title_id,
+                    "insertionIndex": 0,
+                    "text": f"{pagina.get('titulo') or 'Tabela'} (continuação)"
+                }})
+                requests.extend(self._plan_table(continuation_id, tabela, parte, start_y=TABLE_CONTINUATION_Y_PT))
+                slide_ids.append(continuation_id)
 
-    def create_slides_from_structured_json(self, json_path: str) -> str:
+        # Insere imagens (apenas se URLs públicas ou data URI, ajuste conforme necessário)
+        # ...existing code for images (comentado ou a implementar)...
+
+        return requests, slide_ids
+
+    def create_slides_from_structured_json(self, json_path: str, deck_key: str = None) -> str:
         """
         Cria slides no Google Slides a partir de um arquivo JSON estruturado (dados_estruturado.json).
         Cada página do JSON vira um slide, com título, texto, tabelas e imagens.
         Agora insere tabelas reais usando a API do Slides.
+
+        Todos os slides, textos e tabelas são planejados antes e enviados em poucos
+        batchUpdate, independentemente do número de tabelas. Com deck_key, uma nova
+        chamada com a mesma chave altera apenas as páginas que mudaram.
         """
         import pandas as pd  # Garante que pandas está disponível
 
@@ -714,6 +1159,13 @@ class GoogleSlidesClient:
             dados = json.load(f)
         paginas = dados["paginas"]
 
+        # Atualizar incrementalmente a apresentação já associada à chave
+        if deck_key:
+            manifest = self._load_manifest(deck_key, "structured")
+            if manifest:
+                self._update_deck(deck_key, manifest, paginas, self._plan_structured_page)
+                return manifest["presentation_id"]
+
         slides_service = self._get_service('slides', 'v1')
         drive_service = self._get_service('drive', 'v3')
 
@@ -728,75 +1180,65 @@ class GoogleSlidesClient:
             body={'type': 'anyone', 'role': 'reader'}
         ).execute()
 
-        # Remove slide inicial em branco
+        # Remove slide inicial em branco junto com o primeiro lote
         first_slide_id = presentation['slides'][0]['objectId']
-        slides_service.presentations().batchUpdate(
-            presentationId=presentation['presentationId'],
-            body={'requests': [{'deleteObject': {'objectId': first_slide_id}}]}
-        ).execute()
+        requests = [{'deleteObject': {'objectId': first_slide_id}}]
 
         # Cria slides para cada página do JSON
-        for idx, pagina in enumerate(paginas):
-            slide_id = f"slide_{uuid.uuid4().hex[:8]}"
-            layout = "TITLE_AND_BODY" if pagina.get("texto") else "TITLE"
-            slides_service.presentations().batchUpdate(
-                presentationId=presentation['presentationId'],
-                body={'requests': [{
-                    "createSlide": {
-                        "objectId": slide_id,
-                        "insertionIndex": idx,
-                        "slideLayoutReference": {"predefinedLayout": layout}
-                    }
-                }]}
-            ).execute()
+        insertion_index = 0
+        entries = []
+        for pagina in paginas:
+            page_requests, slide_ids = self._plan_structured_page(pagina, insertion_index)
+            requests.extend(page_requests)
+            entries.append({"hash": self._content_hash(pagina), "slide_ids": slide_ids})
+            insertion_index += len(slide_ids)
 
-            # Busca elementos do slide para inserir texto
-            slide = slides_service.presentations().pages().get(
-                presentationId=presentation['presentationId'],
-                pageObjectId=slide_id
-            ).execute()
+        self._batch_requests(presentation['presentationId'], requests, batch_size=MAX_REQUESTS_PER_BATCH)
+        if deck_key:
+            self._save_manifest(deck_key, "structured", presentation['presentationId'], entries)
+        return presentation['presentationId']
 
-            title_id = None
-            body_id = None
-            for el in slide.get("pageElements", []):
-                shape = el.get("shape", {})
-                if shape.get("shapeType") == "TITLE":
-                    title_id = el["objectId"]
-                elif shape.get("shapeType") in ["BODY", "TEXT_BOX"]:
-                    body_id = el["objectId"]
-
-            # Insere título
-            if title_id and pagina.get("titulo"):
-                slides_service.presentations().batchUpdate(
-                    presentationId=presentation['presentationId'],
-                    body={'requests': [{
-                        "insertText": {
-                            "objectId": title_id,
-                            "insertionIndex": 0,
-                            "text": pagina["titulo"]
-                        }
-                    }]}
-                ).execute()
-
-            # Insere texto
-            if body_id and pagina.get("texto"):
-                slides_service.presentations().batchUpdate(
-                    presentationId=presentation['presentationId'],
-                    body={'requests': [{
-                        "insertText": {
-                            "objectId": body_id,
-                            "insertionIndex": 0,
-                            "text": pagina["texto"]
-                        }
-                    }]}
-                ).execute()
 
-            # Insere tabelas reais usando a API do Slides
-            if pagina.get("tabelas"):
-                for tabela in pagina["tabelas"]:
-                    self._create_table_on_slide(slides_service, presentation['presentationId'], slide_id, tabela)
+class AsyncGoogleSlidesClient:
+    """
+    Fachada assíncrona do GoogleSlidesClient.
+
+    As chamadas bloqueantes rodam em um pool de threads compartilhado e limitado, fora
+    do event loop. Cada thread do pool reutiliza seus próprios serviços Google em cache
+    e todas passam pelo mesmo limitador de taxa do processo. O contexto de quem chama
+    segue para a thread, levando o token de cancelamento do job: se o job for cancelado
+    ou expirar, a thread para na próxima chamada à API.
+    """
+
+    def __init__(self, client: GoogleSlidesClient, max_workers: int = 4):
+        self.client = client
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="slides")
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, functools.partial(context.run, fn, *args, **kwargs))
 
-            # Insere imagens (apenas se URLs públicas ou data URI, ajuste conforme necessário)
-            # ...existing code for images (comentado ou a implementar)...
+    async def create_slides_from_json(self, json_data, deck_key: str = None) -> str:
+        return await self._run(self.client.create_slides_from_json, json_data, deck_key=deck_key)
+
+    async def create_slides_from_structured_json(self, json_path: str, deck_key: str = None) -> str:
+        return await self._run(self.client.create_slides_from_structured_json, json_path, deck_key=deck_key)
+
+    async def create_presentation_from_pdf(self, pdf_path: str) -> str:
+        return await self._run(self.client.create_presentation_from_pdf, pdf_path)
+
+    async def get_first_slide_id(self, presentation_id: str) -> str:
+        return await self._run(self.client.get_first_slide_id, presentation_id)
+
+    async def create_many(self, method_name: str, inputs: List[Any]) -> List[Any]:
+        """
+        Gera várias apresentações ao mesmo tempo com um dos métodos acima; a concorrência
+        é limitada pelo tamanho do pool. Falhas são devolvidas como exceções na posição
+        correspondente, sem cancelar as demais.
+        """
+        method = getattr(self, method_name)
+        return await asyncio.gather(*(method(item) for item in inputs), return_exceptions=True)
 
-        return presentation['presentationId']
\ No newline at end of file
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
@@ -1,15 +1,25 @@
 import os
 import logging
-from fastapi import FastAPI, UploadFile, HTTPException, WebSocket, BackgroundTasks
+from fastapi import FastAPI, UploadFile, HTTPException, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse
 import json
-from datetime import datetime
+import uuid
+from typing import Optional
 from contextlib import asynccontextmanager
 from extrator_dados_tecnicos import ExtratorDadosTecnicos
-from google_slides_client import GoogleSlidesClient
+from google_slides_client import GoogleSlidesClient, AsyncGoogleSlidesClient, shutdown_render_pool
+from config import Config
+from utils.job_queue import JobStore, JobQueue, QueueFullError, PENDING_STATES, JOB_QUEUED, JOB_COMPLETED, JOB_CANCELLED
+from utils.cancellation import CancellationToken, JobCancelledError, REASON_CANCELLED, REASON_TIMEOUT
+from utils.upload_storage import (InvalidUploadError, UploadSizeLimitMiddleware, MULTIPART_OVERHEAD_BYTES,
+                                  stream_upload_to_disk, commit_upload)
+from utils.asset_store import LocalAssetStore, get_asset_store
+from utils.template_pool import TemplateCopyPool
+from utils.progress_bus import ProgressBus
+from utils.event_backends import create_event_backend
 from dotenv import load_dotenv, find_dotenv
 import asyncio
-from typing import Dict
 from starlette.websockets import WebSocketDisconnect
 
 # Load environment variables
@@ -20,20 +30,52 @@ _ = load_dotenv(find_dotenv())
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up application...")
+    # Progress events from worker threads are delivered on this loop
+    progress_bus.bind(asyncio.get_running_loop())
     # Initialize services
     slides_client = GoogleSlidesClient(
         credentials_path=".credentials/credentials.json",
         template_presentation_id=os.getenv("TEMPLATE_PRESENTATION_ID")  # Corrigido para usar o ID do template
     )
     app.state.slides_client = slides_client
+    # Keep pre-made template copies ready so new decks skip the Drive copy
+    if Config.TEMPLATE_POOL_SIZE > 0:
+        slides_client.template_pool = TemplateCopyPool(
+            slides_client,
+            size=Config.TEMPLATE_POOL_SIZE,
+            check_interval_seconds=Config.TEMPLATE_POOL_CHECK_SECONDS,
+            version_ttl_seconds=Config.TEMPLATE_POOL_VERSION_TTL_SECONDS
+        )
+        slides_client.template_pool.start()
+    # Slides are built on a shared thread pool so the event loop stays responsive
+    app.state.async_slides_client = AsyncGoogleSlidesClient(slides_client, max_workers=Config.SLIDES_WORKERS)
+
+    # Start the job worker pool
+    job_queue = JobQueue(
+        store=job_store,
+        handler=process_pdf_background,
+        workers=Config.JOB_WORKERS,
+        max_pending=Config.JOB_QUEUE_MAX_PENDING,
+        lease_seconds=Config.JOB_LEASE_SECONDS,
+        timeout_seconds=Config.JOB_TIMEOUT_SECONDS
+    )
+    await job_queue.start()
+    app.state.job_queue = job_queue
     
     yield
     
     # Shutdown
     logger.info("Shutting down application...")
+    await job_queue.stop()
+    await progress_bus.close()
+    app.state.async_slides_client.shutdown()
+    shutdown_render_pool()
+    if slides_client.template_pool is not None:
+        slides_client.template_pool.stop()
     # Cleanup WebSocket connections
-    for ws in connected_clients.values():
-        await ws.close()
+    for sockets in connected_clients.values():
+        for ws in list(sockets):
+            await ws.close()
     connected_clients.clear()
 
 app = FastAPI(lifespan=lifespan)
@@ -69,71 +111,114 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
-# Modify WebSocket connections to include process_id
+# Oversized uploads are refused before Starlette spools the multipart body to disk
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=Config.MAX_UPLOAD_SIZE_MB * 1024 * 1024 + MULTIPART_OVERHEAD_BYTES,
+    paths=["/process-pdf"]
+)
+
+# Open WebSocket connections per process_id (several clients may watch the same job)
 connected_clients = {}
 
-# Add process tracking with timeouts
-active_processes: Dict[str, dict] = {}
-PROCESS_TIMEOUT = 600  # 10 minutes timeout
+# Job events go through the bus, which coalesces progress, keeps a replay buffer per
+# job and fans out to every subscriber. EVENT_BACKEND=sqlite shares events between
+# uvicorn workers, so any worker can serve any job's WebSocket.
+progress_bus = ProgressBus(
+    max_messages_per_second=Config.PROGRESS_MAX_MESSAGES_PER_SECOND,
+    max_queue=Config.WS_SEND_QUEUE_SIZE,
+    backend=create_event_backend(
+        Config.EVENT_BACKEND,
+        buffer_size=Config.PROGRESS_BUFFER_SIZE,
+        ttl_seconds=Config.PROGRESS_BUFFER_TTL_SECONDS,
+        db_path=Config.EVENTS_DB_PATH
+    ),
+    poll_interval=Config.EVENT_POLL_INTERVAL
+)
+
+# Persistent job state (replaces the in-memory process tracking)
+job_store = JobStore(Config.JOBS_DB_PATH)
 
 async def handle_websocket_connection(websocket: WebSocket, process_id: str):
-    """Handle WebSocket connection with proper error handling"""
+    """
+    Stream a job's events to a WebSocket client.
+
+    Sending, receiving and the ping/pong keepalive run as separate tasks, so a slow
+    send never delays pong handling and vice versa. Clients can resume with
+    ?cursor=<last seq received> to replay the events they missed; a client that
+    falls too far behind is disconnected and can reconnect with its cursor.
+    """
+    subscription = None
+    tasks = []
     try:
         await websocket.accept()
-        connected_clients[process_id] = websocket
-        
-        ping_interval = 30  # seconds
-        ping_timeout = 10   # seconds
-        
-        while True:
-            try:
-                # Wait for message or timeout
-                message = await asyncio.wait_for(
-                    websocket.receive_text(),
-                    timeout=ping_interval
-                )
-                
+        connected_clients.setdefault(process_id, set()).add(websocket)
+        cursor = websocket.query_params.get("cursor")
+        subscription = progress_bus.subscribe(process_id, int(cursor) if cursor and cursor.isdigit() else None)
+
+        # Deduplicated uploads may already be finished before any event was published
+        job = job_store.get(process_id)
+        if job and job["status"] == JOB_COMPLETED and job["result"] and progress_bus.last_seq(process_id) == 0:
+            await websocket.send_json({"type": "complete", **await load_job_result(job["result"])})
+
+        last_pong = asyncio.get_running_loop().time()
+
+        async def send_events():
+            while True:
+                event = await subscription.get()
+                if event is None:
+                    logger.warning(f"WebSocket client of process {process_id} is too slow, disconnecting")
+                    await websocket.close(code=1013)
+                    return
+                await websocket.send_json(event)
+
+        async def receive_messages():
+            nonlocal last_pong
+            while True:
+                message = await websocket.receive_text()
                 if message == "pong":
-                    continue
-                    
-            except asyncio.TimeoutError:
-                # Send ping
-                try:
-                    await websocket.send_text("ping")
-                    # Wait for pong
-                    await asyncio.wait_for(
-                        websocket.receive_text(),
-                        timeout=ping_timeout
-                    )
-                except asyncio.TimeoutError:
+                    last_pong = asyncio.get_running_loop().time()
+
+        async def keepalive():
+            while True:
+                await asyncio.sleep(Config.WS_PING_INTERVAL)
+                await websocket.send_text("ping")
+                await asyncio.sleep(Config.WS_PING_TIMEOUT)
+                if asyncio.get_running_loop().time() - last_pong > Config.WS_PING_INTERVAL + Config.WS_PING_TIMEOUT:
                     logger.warning(f"WebSocket ping timeout for process {process_id}")
-                    break
-                    
+                    return
+
+        tasks = [
+            asyncio.create_task(send_events()),
+            asyncio.create_task(receive_messages()),
+            asyncio.create_task(keepalive())
+        ]
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for process {process_id}")
     except Exception as e:
         logger.error(f"WebSocket error for process {process_id}: {str(e)}")
     finally:
-        if process_id in connected_clients:
-            del connected_clients[process_id]
+        for task in tasks:
+            task.cancel()
+        if subscription is not None:
+            progress_bus.unsubscribe(subscription)
+        sockets = connected_clients.get(process_id)
+        if sockets is not None:
+            sockets.discard(websocket)
+            if not sockets:
+                del connected_clients[process_id]
 
 @app.websocket("/ws/{process_id}")
 async def websocket_endpoint(websocket: WebSocket, process_id: str):
     await handle_websocket_connection(websocket, process_id)
 
 async def notify_client(process_id: str, message: dict):
-    """Notify specific WebSocket client"""
-    if process_id in connected_clients:
-        try:
-            await connected_clients[process_id].send_json(message)
-        except Exception as e:
-            logger.error(f"Error sending WebSocket message: {str(e)}")
-
-# Inicializar Google Slides Client
-slides_client = GoogleSlidesClient(
-    credentials_path=".credentials/credentials.json",
-    template_presentation_id=os.getenv("TEMPLATE_PRESENTATION_ID")  # Corrigido para usar o ID do template
-)
+    """Notify every WebSocket client watching the process"""
+    progress_bus.publish(process_id, message)
 
 class DataProcessor:
     @staticmethod
@@ -150,47 +235,62 @@ class DataProcessor:
                 sections.append(section)
         return sections
 
-# Add process tracking
-active_processes: Dict[str, dict] = {}
+def load_extraction_result(path: str) -> dict:
+    """Load the JSON written by the extractor for a processed PDF"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
 
-async def handle_progress_update(process_id: str, stage: str, progress: int):
-    """Handle progress updates from the extractor"""
-    if process_id in active_processes:
-        try:
-            await notify_client(process_id, {
-                "type": "progress",
-                "stage": stage,
-                "progress": progress,
-                "message": f"Processando... {progress}%"
-            })
-        except Exception as e:
-            logger.error(f"Error updating progress: {str(e)}")
+async def load_job_result(result: Optional[dict]) -> Optional[dict]:
+    """A job's stored result as sent to clients, with the slides loaded from its extracted JSON"""
+    if not result:
+        return result
+    result = dict(result)
+    slides_file = result.pop("slides_file", None)
+    if slides_file and os.path.exists(slides_file):
+        result["slides"] = await asyncio.to_thread(load_extraction_result, slides_file)
+    return result
+
+def persist_progress(process_id: str, event: dict):
+    """Store the (coalesced) progress delivered by the bus in the job record (runs on the bus writer thread)"""
+    if event.get("type") != "progress" or "stage" not in event:
+        return
+    job = job_store.get(process_id)
+    if job and job["status"] in PENDING_STATES:
+        job_store.update(process_id, stage=event["stage"], progress=event["progress"])
+
+progress_bus.add_listener(persist_progress)
 
-async def process_pdf_background(process_id: str, file_path: str):
+async def process_pdf_background(process_id: str, file_path: str, token: CancellationToken):
     try:
-        active_processes[process_id] = {"status": "processing", "progress": 0}
-        
-        # Define sync progress callback
+        # Callbacks may run on the loop or on executor threads; the bus handles both
         def progress_callback(stage: str, progress: int):
-            # Use asyncio.create_task to handle the async notification
-            asyncio.create_task(notify_client(process_id, {
+            progress_bus.publish(process_id, {
                 "type": "progress",
                 "stage": stage,
                 "progress": progress,
                 "message": f"Processando... {progress}%"
-            }))
+            })
+
+        # Push each page to the client as soon as it is processed
+        def page_callback(page: dict):
+            progress_bus.publish(process_id, {
+                "type": "page",
+                "page": page
+            })
 
-        # Initialize extractor with sync callback
         extractor = ExtratorDadosTecnicos(
             api_key=os.getenv("MISTRAL_API_KEY"),
             output_dir="output",
             figs_dir="figs",
-            progress_callback=progress_callback
+            progress_callback=progress_callback,
+            page_callback=page_callback,
+            max_workers_ocr=Config.OCR_IMAGE_WORKERS,
+            paginas_por_parte=Config.OCR_PAGES_PER_RANGE,
+            max_workers_partes=Config.OCR_RANGE_WORKERS,
+            max_tentativas_parte=Config.OCR_RANGE_RETRIES,
+            cancelamento=token
         )
 
-        # Initialize progress
-        active_processes[process_id] = {"status": "processing", "progress": 0}
-        
         # Update client about OCR start
         await notify_client(process_id, {
             "type": "status",
@@ -199,26 +299,16 @@ async def process_pdf_background(process_id: str, file_path: str):
             "message": "Iniciando processamento do PDF..."
         })
 
-        # Create progress callback that works with async
-        async def progress_callback(stage: str, progress: int):
-            await handle_progress_update(process_id, stage, progress)
-
-        # Initialize extractor with progress callback
-        extractor = ExtratorDadosTecnicos(
-            api_key=os.getenv("MISTRAL_API_KEY"),
-            output_dir="output",
-            figs_dir="figs",
-            progress_callback=lambda stage, progress: asyncio.run(progress_callback(stage, progress))
-        )
-        
-        # Process PDF in chunks
-        result = await asyncio.get_event_loop().run_in_executor(
-            None, extractor.processar_arquivo, file_path
-        )
+        # Run upload and OCR as coroutines instead of tying up an executor thread; pages
+        # are streamed to the output files instead of being kept in memory
+        summary = await extractor.aprocessar_arquivo(file_path)
 
-        if not result:
+        if not summary:
             raise Exception("Falha ao extrair dados do PDF")
 
+        # The deck and the final "complete" event need the whole document
+        result = await asyncio.to_thread(load_extraction_result, summary["arquivo_json"])
+
         # Process slides data
         await notify_client(process_id, {
             "type": "status",
@@ -238,15 +328,24 @@ async def process_pdf_background(process_id: str, file_path: str):
             "slide_id": presentation_result.get("slide_id")
         })
 
+        # Repeat uploads of the document get the slides back from the extracted JSON
+        return {**presentation_result, "slides_file": summary["arquivo_json"]}
+
+    except (asyncio.CancelledError, JobCancelledError):
+        # Stopped by DELETE /jobs/{id} or by the job deadline (the queue records the final
+        # state); jobs interrupted by a shutdown resume on the next start
+        if token.reason == REASON_CANCELLED:
+            await notify_client(process_id, {"type": "cancelled", "message": REASON_CANCELLED})
+        elif token.reason == REASON_TIMEOUT or token.expired:
+            await notify_client(process_id, {"type": "error", "message": REASON_TIMEOUT})
+        raise
     except Exception as e:
         logger.error(f"Error in background process: {str(e)}")
         await notify_client(process_id, {
             "type": "error",
             "message": str(e)
         })
-    finally:
-        if process_id in active_processes:
-            del active_processes[process_id]
+        raise
 
 async def create_google_presentation(process_id: str, slides_data: list):
     try:
@@ -266,10 +365,12 @@ async def create_google_presentation(process_id: str, slides_data: list):
         
         # Transformar dados para o formato esperado pelo Google Slides
         processed_slides = DataProcessor.transform_to_slides(slides_data)
+        slides_client = app.state.async_slides_client
         
-        presentation_id = slides_client.create_slides_from_json(processed_slides)
+        # Each job builds its deck once, so identical content can reuse a cached deck
+        presentation_id = await slides_client.create_slides_from_json(processed_slides)
         presentation_url = f"https://docs.google.com/presentation/d/{presentation_id}/edit"
-        first_slide = slides_client.get_first_slide_id(presentation_id)
+        first_slide = await slides_client.get_first_slide_id(presentation_id)
         
         return {
             "presentation_url": presentation_url,
@@ -280,41 +381,94 @@ async def create_google_presentation(process_id: str, slides_data: list):
         raise
 
 @app.post("/process-pdf")
-async def process_pdf(file: UploadFile, background_tasks: BackgroundTasks):
+async def process_pdf(file: UploadFile):
     """Process uploaded PDF file and extract data"""
-    process_id = datetime.now().strftime("%Y%m%d%H%M%S")
+    process_id = uuid.uuid4().hex
     
     try:
-        # Save uploaded file
-        file_path = os.path.join("output", file.filename)
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-
-        # Start background processing and cleanup
-        background_tasks.add_task(process_pdf_background, process_id, file_path)
-        background_tasks.add_task(cleanup_process, process_id)
+        # Stream the upload to disk, hashing and validating it chunk by chunk
+        tmp_path, content_hash, size = await stream_upload_to_disk(
+            file,
+            dest_dir=Config.UPLOADS_DIR,
+            max_bytes=Config.MAX_UPLOAD_SIZE_MB * 1024 * 1024,
+            chunk_size=Config.UPLOAD_CHUNK_SIZE
+        )
+        logger.info(f"Received {file.filename} ({size} bytes, sha256 {content_hash})")
+
+        # Keep the uploaded file under its content hash (a no-op for a known document)
+        file_path = commit_upload(tmp_path, os.path.join(Config.UPLOADS_DIR, f"{content_hash}.pdf"))
+
+        # Enqueue the job, or reuse the result (or the running job) of an identical
+        # upload; it is stopped if it runs past Config.JOB_TIMEOUT_SECONDS
+        job, created = app.state.job_queue.submit(process_id, file_path, content_hash)
+        if not created:
+            logger.info(f"Upload {file.filename} matches job {job['id']} ({job['status']})")
+            return {
+                "process_id": job["id"],
+                "status": job["status"],
+                "result": await load_job_result(job["result"])
+            }
         
-        return {"process_id": process_id, "status": "processing"}
+        return {"process_id": process_id, "status": job["status"]}
         
+    except InvalidUploadError as e:
+        logger.warning(f"Rejecting upload {file.filename}: {str(e)}")
+        raise HTTPException(e.status_code, str(e))
+    except QueueFullError as e:
+        logger.warning(f"Rejecting upload: {str(e)}")
+        raise HTTPException(503, str(e))
     except Exception as e:
         logger.error(f"Error initiating process: {str(e)}")
         raise HTTPException(500, str(e))
 
-async def cleanup_process(process_id: str):
-    """Cleanup process after timeout"""
-    await asyncio.sleep(PROCESS_TIMEOUT)
-    if process_id in active_processes:
-        logger.warning(f"Process {process_id} timed out")
-        await notify_client(process_id, {
-            "type": "error",
-            "message": "Processo expirou por timeout"
-        })
-        del active_processes[process_id]
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Return the current state of a processing job"""
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    return {
+        "process_id": job["id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "progress": job["progress"],
+        "result": await load_job_result(job["result"]),
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"]
+    }
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job, stopping its OCR and Slides calls"""
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    if not app.state.job_queue.cancel(job_id):
+        raise HTTPException(409, f"Job already {job_store.get(job_id)['status']}")
+    # Queued jobs never reach the handler, so let their clients know here
+    if job["status"] == JOB_QUEUED:
+        await notify_client(job_id, {"type": "cancelled", "message": REASON_CANCELLED})
+    return {"process_id": job_id, "status": JOB_CANCELLED}
+
+@app.get("/assets/{asset_name}")
+async def get_asset(asset_name: str):
+    """Serve a content-addressed image referenced by generated slides"""
+    asset_store = get_asset_store()
+    if not isinstance(asset_store, LocalAssetStore):
+        raise HTTPException(404, "Asset not found")
+    try:
+        path = asset_store.path_for(asset_name)
+    except ValueError:
+        raise HTTPException(404, "Asset not found")
+    if not os.path.exists(path):
+        raise HTTPException(404, "Asset not found")
+    # O conteúdo nunca muda para um mesmo nome (hash), então pode ser cacheado para sempre
+    return FileResponse(path, headers={"Cache-Control": "public, max-age=31536000, immutable"})
 
 @app.post("/create-google-slides")
 async def create_google_slides(process_id: str):
-    slides_client = app.state.slides_client
+    slides_client = app.state.async_slides_client
     logger.info(f"[{process_id}] Starting Google Slides creation")
     try:
         # Load and parse JSON file
@@ -335,11 +489,12 @@ async def create_google_slides(process_id: str):
         
         logger.info(f"[{process_id}] Creating Google Slides presentation")
         # Create Google Slides presentation
-        presentation_id = slides_client.create_slides_from_json(slides_data)
+        # Re-running for the same process patches the existing deck instead of rebuilding it
+        presentation_id = await slides_client.create_slides_from_json(slides_data, deck_key=process_id)
         presentation_url = f"https://docs.google.com/presentation/d/{presentation_id}/edit"
         
         # Get first slide ID
-        first_slide = slides_client.get_first_slide_id(presentation_id)
+        first_slide = await slides_client.get_first_slide_id(presentation_id)
         
         await notify_client(process_id, {
             "type": "complete",
@@ -0,0 +1,187 @@
+"""
+Emulador local das rotas do Mistral usadas no OCR (files.upload, files.get_signed_url e ocr.process).
+
+Reproduz respostas de ocr.process gravadas em Config.MISTRAL_EMULATOR_RECORDINGS_DIR: um
+arquivo <sha256 do documento>.json é usado para o documento correspondente e, sem
+gravação específica, as gravações disponíveis são usadas em rodízio. Sem nenhuma
+gravação, gera páginas sintéticas com markdown e uma imagem PNG em base64.
+Aceita tanto o JSON de ocr.process (model_dump) quanto as entradas do cache de OCR.
+
+Latência e taxa de erros vêm de Config (MISTRAL_EMULATOR_*). Para apontar os clientes
+para o emulador, defina MISTRAL_SERVER_URL (ex.: http://localhost:8091) e rode:
+
+    python mistral_ocr_emulator.py
+"""
+import os
+import json
+import time
+import uuid
+import zlib
+import base64
+import struct
+import random
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from fastapi import FastAPI, Request, UploadFile, File, Form
+from fastapi.responses import JSONResponse
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="Mistral OCR emulator")
+
+_lock = threading.Lock()
+_files = {}
+_stats = defaultdict(int)
+_recordings = None
+_next_recording = 0
+
+
+def _tiny_png(width: int = 32, height: int = 32) -> bytes:
+    """PNG cinza mínimo, sem depender do Pillow"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+    raw = b"".join(b"\x00" + b"\x80" * width for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw))
+            + chunk(b"IEND", b""))
+
+
+def _synthetic_response(num_pages: int) -> dict:
+    image_base64 = base64.b64encode(_tiny_png()).decode()
+    pages = []
+    for index in range(num_pages):
+        pages.append({
+            "index": index,
+            "markdown": f"# Página {index + 1}\n\nGene APOE | Variante rs429358 | Genótipo C/T\n\n![img-0.png](img-0.png)",
+            "images": [{
+                "id": "img-0.png",
+                "top_left_x": 100, "top_left_y": 100, "bottom_right_x": 300, "bottom_right_y": 300,
+                "image_base64": image_base64
+            }],
+            "dimensions": {"dpi": 200, "height": 2200, "width": 1700}
+        })
+    return {"pages": pages, "model": "mistral-ocr-latest", "usage_info": {"pages_processed": num_pages, "doc_size_bytes": None}}
+
+
+def _load_recordings() -> dict:
+    """Gravações por nome de arquivo (sem extensão), carregadas uma única vez"""
+    global _recordings
+    if _recordings is None:
+        _recordings = {}
+        directory = Config.MISTRAL_EMULATOR_RECORDINGS_DIR
+        if directory and os.path.isdir(directory):
+            for name in sorted(os.listdir(directory)):
+                if not name.endswith(".json"):
+                    continue
+                with open(os.path.join(directory, name), encoding="utf-8") as f:
+                    recording = json.load(f)
+                # Entradas do cache de OCR guardam a resposta em "value"
+                if "value" in recording and "pages" not in recording:
+                    recording = recording["value"]
+                _recordings[name[:-len(".json")]] = recording
+        logger.info(f"Loaded {len(_recordings)} OCR recordings")
+    return _recordings
+
+
+def _response_for(content_hash: str) -> dict:
+    global _next_recording
+    recordings = _load_recordings()
+    if content_hash in recordings:
+        return recordings[content_hash]
+    if recordings:
+        names = sorted(recordings)
+        name = names[_next_recording % len(names)]
+        _next_recording += 1
+        return recordings[name]
+    return _synthetic_response(Config.MISTRAL_EMULATOR_SYNTHETIC_PAGES)
+
+
+def _error(code: int, message: str) -> JSONResponse:
+    headers = {"Retry-After": "1"} if code == 429 else None
+    return JSONResponse(status_code=code, content={"object": "error", "message": message, "code": str(code)}, headers=headers)
+
+
+async def _simulate(operation: str, pages: int = 0):
+    """Aplica latência (base + por página) e devolve uma resposta de erro aleatória, se sorteada"""
+    latency = (Config.MISTRAL_EMULATOR_LATENCY_MS + pages * Config.MISTRAL_EMULATOR_LATENCY_PER_PAGE_MS) / 1000
+    if latency:
+        await asyncio.sleep(random.uniform(0.5 * latency, 1.5 * latency))
+    with _lock:
+        _stats[operation] += 1
+    if random.random() < Config.MISTRAL_EMULATOR_ERROR_RATE:
+        with _lock:
+            _stats["errors"] += 1
+        return _error(random.choice((429, 500)), "Simulated error")
+    return None
+
+
+@app.post("/v1/files")
+async def upload_file(file: UploadFile = File(...), purpose: str = Form("ocr")):
+    data = await file.read()
+    error = await _simulate("files.upload")
+    if error:
+        return error
+    file_id = str(uuid.uuid4())
+    with _lock:
+        _files[file_id] = hashlib.sha256(data).hexdigest()
+    return {
+        "id": file_id,
+        "object": "file",
+        "bytes": len(data),
+        "created_at": int(time.time()),
+        "filename": file.filename,
+        "purpose": purpose,
+        "sample_type": "ocr_input",
+        "source": "upload"
+    }
+
+
+@app.get("/v1/files/{file_id}/url")
+async def get_signed_url(file_id: str, request: Request):
+    error = await _simulate("files.get_signed_url")
+    if error:
+        return error
+    if file_id not in _files:
+        return _error(404, f"File {file_id} not found")
+    return {"url": f"{str(request.base_url).rstrip('/')}/_emulator/files/{file_id}"}
+
+
+@app.post("/v1/ocr")
+async def process_ocr(request: Request):
+    body = await request.json()
+    document = body.get("document", {})
+    url = document.get("document_url") or document.get("image_url") or ""
+    file_id = url.rsplit("/", 1)[-1]
+    with _lock:
+        content_hash = _files.get(file_id, hashlib.sha256(url.encode("utf-8")).hexdigest())
+        response = _response_for(content_hash)
+    error = await _simulate("ocr.process", pages=len(response.get("pages", [])))
+    if error:
+        return error
+    with _lock:
+        _stats["pages"] += len(response.get("pages", []))
+    return dict(response, model=body.get("model", response.get("model")))
+
+
+@app.get("/_emulator/stats")
+async def get_stats():
+    with _lock:
+        return {"calls": dict(_stats), "files": len(_files), "recordings": len(_load_recordings())}
+
+
+@app.post("/_emulator/reset")
+async def reset():
+    with _lock:
+        _files.clear()
+        _stats.clear()
+    return {"status": "ok"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=Config.MISTRAL_EMULATOR_PORT, log_level="info")
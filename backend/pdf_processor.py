@@ -5,9 +5,15 @@ from typing import Dict, Any, List, Optional
 from mistralai import Mistral, DocumentURLChunk, ImageURLChunk, TextChunk
 from mistralai.models.sdkerror import SDKError
 import re
+from utils.cache_manager import OCRCache, get_ocr_cache, sha256_file
+from utils.rate_limiter import call_with_backoff, get_rate_limiter
+from config import Config
 
 logger = logging.getLogger(__name__)
 
+PDF_HEADER = b"%PDF"
+OCR_MODEL = "mistral-ocr-latest"
+
 # Classe Document personalizada
 class Document:
     def __init__(self, page_content: str, metadata: dict = None):
@@ -15,44 +21,61 @@ class Document:
         self.metadata = metadata or {}
 
 class PDFProcessor:
-    def __init__(self, file_path: str, mistral_api_key: str):
+    def __init__(self, file_path: str, mistral_api_key: str, ocr_cache: Optional[OCRCache] = None):
         if not mistral_api_key:
             raise ValueError("A chave de API Mistral não foi fornecida.")
         self.file_path = file_path
-        self.client = Mistral(api_key=mistral_api_key)
+        self.client = Mistral(api_key=mistral_api_key, server_url=Config.MISTRAL_SERVER_URL)
+        self.ocr_cache = ocr_cache if ocr_cache is not None else get_ocr_cache()
 
     def _call_mistral_ocr(self) -> str:
         """Processa o PDF usando OCR e salva o resultado em JSON."""
         try:
+            output_path = os.path.join("output", "extracted_text_result.json")
+            os.makedirs("output", exist_ok=True)  # Garantir que a pasta de saída exista
+
+            # Reutilizar o OCR de um documento idêntico, se disponível
+            content_hash = sha256_file(self.file_path) if self.ocr_cache else None
+            if content_hash:
+                cached = self.ocr_cache.get_ocr(content_hash, OCR_MODEL)
+                if cached is not None:
+                    with open(output_path, "w", encoding="utf-8") as output_file:
+                        json.dump(cached, output_file, indent=4)
+                    return output_path
+
             # Upload do arquivo para a API
             logger.info(f"Fazendo upload do arquivo: {self.file_path}")
-            with open(self.file_path, "rb") as file_content:
-                uploaded_file = self.client.files.upload(
-                    file={
-                        "file_name": os.path.basename(self.file_path),
-                        "content": file_content,
-                    },
-                    purpose="ocr"
-                )
+            def upload():
+                with open(self.file_path, "rb") as file_content:
+                    return self.client.files.upload(
+                        file={
+                            "file_name": os.path.basename(self.file_path),
+                            "content": file_content,
+                        },
+                        purpose="ocr"
+                    )
+
+            limiter = get_rate_limiter("mistral")
+            uploaded_file = call_with_backoff(upload, limiter=limiter, max_retries=Config.API_MAX_RETRIES)
 
             # Obter URL assinada para o arquivo enviado
             logger.info("Obtendo URL assinada para o arquivo enviado.")
-            signed_url = self.client.files.get_signed_url(
+            signed_url = call_with_backoff(lambda: self.client.files.get_signed_url(
                 file_id=uploaded_file.id,
                 expiry=1  # Tempo de expiração em horas
-            )
+            ), limiter=limiter, max_retries=Config.API_MAX_RETRIES)
 
             # Processar OCR para extrair texto
             logger.info("Processando OCR para extrair texto.")
-            ocr_result = self.client.ocr.process(
-                model="mistral-ocr-latest",
+            ocr_result = call_with_backoff(lambda: self.client.ocr.process(
+                model=OCR_MODEL,
                 document=DocumentURLChunk(document_url=signed_url.url)
-            )
+            ), limiter=limiter, max_retries=Config.API_MAX_RETRIES)
 
             # Converter o resultado para um dicionário e salvar em JSON
             ocr_result_dict = ocr_result.model_dump()
-            output_path = os.path.join("output", "extracted_text_result.json")
-            os.makedirs("output", exist_ok=True)  # Garantir que a pasta de saída exista
+            if content_hash:
+                self.ocr_cache.set_ocr(content_hash, OCR_MODEL, ocr_result_dict)
             with open(output_path, "w", encoding="utf-8") as output_file:
                 json.dump(ocr_result_dict, output_file, indent=4)
 
@@ -82,11 +105,17 @@ class PDFProcessor:
             logger.error(f"Erro crítico durante a extração de dados: {e}")
             return {"error": str(e), "source": "OCR"}
 
+    @staticmethod
+    def has_pdf_header(data: bytes) -> bool:
+        """Verifica se os primeiros bytes correspondem ao cabeçalho de um PDF."""
+        return data[:len(PDF_HEADER)] == PDF_HEADER
+
+    @staticmethod
     def validate_pdf(file_path: str):
         try:
             with open(file_path, "rb") as f:
-                header = f.read(4)
-                if header != b"%PDF":
+                header = f.read(len(PDF_HEADER))
+                if not PDFProcessor.has_pdf_header(header):
                     raise ValueError("Invalid PDF header")
         except Exception as e:
             logger.error(f"Invalid PDF: {str(e)}")
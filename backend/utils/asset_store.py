@@ -0,0 +1,136 @@
+import os
+import re
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Optional
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+}
+
+# Nomes de asset válidos: <sha256>.<extensão>
+ASSET_NAME_PATTERN = re.compile(r"^[0-9a-f]{64}\.(png|jpg)$")
+
+
+class AssetStore:
+    """Content-addressed store for images referenced by URL from slide requests"""
+
+    def put(self, data: bytes, content_type: str = "image/png") -> str:
+        """Store the bytes (once per content hash) and return their public URL"""
+        name = self.asset_name(data, content_type)
+        if not self.exists(name):
+            self._write(name, data, content_type)
+        return self.url_for(name)
+
+    @staticmethod
+    def asset_name(data: bytes, content_type: str) -> str:
+        return f"{hashlib.sha256(data).hexdigest()}.{CONTENT_TYPE_EXTENSIONS[content_type]}"
+
+    def exists(self, name: str) -> bool:
+        raise NotImplementedError
+
+    def url_for(self, name: str) -> str:
+        raise NotImplementedError
+
+    def _write(self, name: str, data: bytes, content_type: str) -> None:
+        raise NotImplementedError
+
+
+class LocalAssetStore(AssetStore):
+    """Assets kept on local disk and served by the API under /assets"""
+
+    def __init__(self, directory: str, base_url: str):
+        self.directory = directory
+        self.base_url = base_url.rstrip("/")
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, name: str) -> str:
+        if not ASSET_NAME_PATTERN.match(name):
+            raise ValueError(f"Nome de asset inválido: {name}")
+        return os.path.join(self.directory, name)
+
+    def exists(self, name: str) -> bool:
+        return os.path.exists(self.path_for(name))
+
+    def url_for(self, name: str) -> str:
+        return f"{self.base_url}/assets/{name}"
+
+    def _write(self, name: str, data: bytes, content_type: str) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path_for(name))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+class S3AssetStore(AssetStore):
+    """Assets uploaded to an S3-compatible bucket and served from its public URL"""
+
+    def __init__(self, bucket: str, public_base_url: str, prefix: str = "assets",
+                 endpoint_url: Optional[str] = None):
+        try:
+            import boto3
+        except ImportError:
+            raise ValueError("boto3 não instalado; necessário para ASSET_STORE_BACKEND=s3")
+        self.bucket = bucket
+        self.public_base_url = public_base_url.rstrip("/")
+        self.prefix = prefix.strip("/")
+        self._client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}/{name}" if self.prefix else name
+
+    def exists(self, name: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self._client.head_object(Bucket=self.bucket, Key=self._key(name))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def url_for(self, name: str) -> str:
+        return f"{self.public_base_url}/{self._key(name)}"
+
+    def _write(self, name: str, data: bytes, content_type: str) -> None:
+        self._client.put_object(
+            Bucket=self.bucket,
+            Key=self._key(name),
+            Body=data,
+            ContentType=content_type,
+            CacheControl="public, max-age=31536000, immutable"
+        )
+
+
+_asset_store: Optional[AssetStore] = None
+_asset_store_lock = threading.Lock()
+
+
+def get_asset_store() -> AssetStore:
+    """Process-wide asset store for the backend selected in Config"""
+    global _asset_store
+    with _asset_store_lock:
+        if _asset_store is None:
+            if Config.ASSET_STORE_BACKEND == "s3":
+                _asset_store = S3AssetStore(
+                    bucket=Config.ASSETS_S3_BUCKET,
+                    public_base_url=Config.ASSETS_PUBLIC_URL,
+                    prefix=Config.ASSETS_S3_PREFIX,
+                    endpoint_url=Config.ASSETS_S3_ENDPOINT_URL
+                )
+            elif Config.ASSET_STORE_BACKEND == "local":
+                _asset_store = LocalAssetStore(Config.ASSETS_DIR, Config.ASSETS_PUBLIC_URL)
+            else:
+                raise ValueError(f"ASSET_STORE_BACKEND desconhecido: {Config.ASSET_STORE_BACKEND}")
+        return _asset_store
@@ -1,29 +1,270 @@
 import os
 import json
-from datetime import datetime, timedelta
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Any, Optional
+from config import Config
 
-class SlidesCacheManager:
-    def __init__(self, cache_dir="cache"):
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """JSON file cache bounded by total size, with LRU eviction and a TTL"""
+
+    def __init__(self, cache_dir: str, max_bytes: int, ttl_seconds: Optional[float] = None):
         self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_sweeper = threading.Event()
         os.makedirs(cache_dir, exist_ok=True)
-        
+        self._total_bytes = sum(size for _, _, size in self._entries())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _entries(self):
+        """(path, last access time, size) of every cache file"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _remove(self, path: str) -> None:
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._total_bytes -= size
+            self.evictions += 1
+
+    def _record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self._record(hit=False)
+            return None
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Discarding unreadable cache entry {path}: {str(e)}")
+            self._remove(path)
+            self._record(hit=False)
+            return None
+
+        if self.ttl_seconds is not None and time.time() - entry["created_at"] > self.ttl_seconds:
+            self._remove(path)
+            self._record(hit=False)
+            return None
+
+        # Touch the file so the LRU eviction sees it as recently used
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self._record(hit=True)
+        return entry["value"]
+
+    def set(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"created_at": time.time(), "value": value}, f, ensure_ascii=False)
+            size = os.path.getsize(tmp_path)
+            previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            self._total_bytes += size - previous_size
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def evict(self) -> None:
+        """Remove expired entries, then least recently used ones until under max_bytes"""
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        if self.ttl_seconds is not None:
+            # An entry not accessed within the TTL is necessarily older than the TTL
+            cutoff = time.time() - self.ttl_seconds
+            expired = [entry for entry in entries if entry[1] < cutoff]
+            for path, _, _ in expired:
+                self._remove(path)
+            entries = entries[len(expired):]
+        for path, _, _ in entries:
+            with self._lock:
+                if self._total_bytes <= self.max_bytes:
+                    break
+            self._remove(path)
+            logger.debug(f"Evicted cache entry {path}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes
+            }
+
+    def start_sweeper(self, interval_seconds: float) -> None:
+        """Run evict() periodically in a daemon thread"""
+        if self._sweeper is not None:
+            return
+        self._stop_sweeper.clear()
+
+        def sweep():
+            while not self._stop_sweeper.wait(interval_seconds):
+                try:
+                    self.evict()
+                except Exception as e:
+                    logger.error(f"Cache sweep of {self.cache_dir} failed: {str(e)}")
+
+        self._sweeper = threading.Thread(target=sweep, name=f"cache-sweeper-{os.path.basename(self.cache_dir)}", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        if self._sweeper is None:
+            return
+        self._stop_sweeper.set()
+        self._sweeper.join()
+        self._sweeper = None
+
+
+class OCRCache(DiskCache):
+    """Cache of Mistral OCR responses keyed by document content and OCR model"""
+
+    @staticmethod
+    def key_for(content_hash: str, model: str) -> str:
+        return hashlib.sha256(f"{model}:{content_hash}".encode("utf-8")).hexdigest()
+
+    def get_ocr(self, content_hash: str, model: str) -> Optional[dict]:
+        result = self.get(self.key_for(content_hash, model))
+        if result is not None:
+            logger.info(f"OCR cache hit for {content_hash[:12]} ({model})")
+        return result
+
+    def set_ocr(self, content_hash: str, model: str, ocr_result: dict) -> None:
+        self.set(self.key_for(content_hash, model), ocr_result)
+
+
+_ocr_cache: Optional[OCRCache] = None
+_ocr_cache_lock = threading.Lock()
+
+
+def get_ocr_cache() -> Optional[OCRCache]:
+    """Process-wide OCR cache configured from Config, or None when disabled"""
+    global _ocr_cache
+    if not Config.OCR_CACHE_ENABLED:
+        return None
+    with _ocr_cache_lock:
+        if _ocr_cache is None:
+            _ocr_cache = OCRCache(
+                cache_dir=Config.OCR_CACHE_DIR,
+                max_bytes=Config.OCR_CACHE_MAX_MB * 1024 * 1024,
+                ttl_seconds=Config.OCR_CACHE_TTL_HOURS * 3600
+            )
+            _ocr_cache.start_sweeper(Config.CACHE_SWEEP_INTERVAL_SECONDS)
+    return _ocr_cache
+
+
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SlidesCacheManager(DiskCache):
+    """Cache of generated presentations keyed by a stable digest of the slide payload"""
+
+    def __init__(self, cache_dir="cache", max_bytes: int = 50 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = 24 * 3600):
+        super().__init__(cache_dir, max_bytes, ttl_seconds)
+
     def get_cache_key(self, data):
         """Generate cache key based on content"""
-        return str(hash(str(data)))
-    
+        payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
     def get_cached_slides(self, cache_key):
-        cache_file = os.path.join(self.cache_dir, f"{cache_key}.json")
-        if not os.path.exists(cache_file):
-            return None
-            
-        # Check if cache is still valid (24h)
-        if datetime.fromtimestamp(os.path.getmtime(cache_file)) < datetime.now() - timedelta(hours=24):
-            return None
-            
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    
+        return self.get(cache_key)
+
     def cache_slides(self, cache_key, slides_data):
-        cache_file = os.path.join(self.cache_dir, f"{cache_key}.json")
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(slides_data, f, ensure_ascii=False)
+        self.set(cache_key, slides_data)
+
+
+_slides_cache: Optional[SlidesCacheManager] = None
+_slides_cache_lock = threading.Lock()
+
+
+def get_slides_cache() -> Optional[SlidesCacheManager]:
+    """Process-wide slides cache configured from Config, or None when disabled"""
+    global _slides_cache
+    if not Config.SLIDES_CACHE_ENABLED:
+        return None
+    with _slides_cache_lock:
+        if _slides_cache is None:
+            _slides_cache = SlidesCacheManager(
+                cache_dir=Config.SLIDES_CACHE_DIR,
+                max_bytes=Config.SLIDES_CACHE_MAX_MB * 1024 * 1024,
+                ttl_seconds=Config.SLIDES_CACHE_TTL_HOURS * 3600
+            )
+            _slides_cache.start_sweeper(Config.CACHE_SWEEP_INTERVAL_SECONDS)
+    return _slides_cache
+
+
+class DeckManifestStore(DiskCache):
+    """Manifests of generated decks: content hash of each section and the slides it produced"""
+
+    def get_manifest(self, deck_key: str) -> Optional[dict]:
+        return self.get(hashlib.sha256(deck_key.encode("utf-8")).hexdigest())
+
+    def save_manifest(self, deck_key: str, manifest: dict) -> None:
+        self.set(hashlib.sha256(deck_key.encode("utf-8")).hexdigest(), manifest)
+
+
+_deck_manifests: Optional[DeckManifestStore] = None
+_deck_manifests_lock = threading.Lock()
+
+
+def get_deck_manifests() -> DeckManifestStore:
+    """Process-wide deck manifest store configured from Config"""
+    global _deck_manifests
+    with _deck_manifests_lock:
+        if _deck_manifests is None:
+            _deck_manifests = DeckManifestStore(
+                cache_dir=Config.DECK_MANIFEST_DIR,
+                max_bytes=Config.DECK_MANIFEST_MAX_MB * 1024 * 1024,
+                ttl_seconds=Config.DECK_MANIFEST_TTL_HOURS * 3600
+            )
+    return _deck_manifests
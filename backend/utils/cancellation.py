@@ -0,0 +1,89 @@
+import time
+import asyncio
+import threading
+from contextvars import ContextVar
+from typing import Optional
+
+# Motivos de cancelamento
+REASON_CANCELLED = "Processo cancelado"
+REASON_TIMEOUT = "Processo expirou por timeout"
+REASON_SHUTDOWN = "Servidor encerrado"
+REASON_LEASE_LOST = "Job assumido por outro processo"
+
+
+class JobCancelledError(Exception):
+    """Raised by cancellation checks once a job was cancelled or ran past its deadline"""
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation flag with an optional deadline, shared by a job's coroutines
+    and worker threads.
+
+    Long-running code calls check() between units of work (pages, image OCR calls, API
+    attempts) and uses sleep()/asleep() for waits, which give up as soon as the job is
+    cancelled or when the wait would run past the deadline.
+    """
+
+    def __init__(self, timeout_seconds: Optional[float] = None):
+        self.deadline = time.monotonic() + timeout_seconds if timeout_seconds else None
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+
+    def cancel(self, reason: str = REASON_CANCELLED) -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set() or self.expired
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline, or None without a deadline"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self) -> None:
+        if self._event.is_set():
+            raise JobCancelledError(self.reason)
+        if self.expired:
+            self.cancel(REASON_TIMEOUT)
+            raise JobCancelledError(REASON_TIMEOUT)
+
+    def _check_wait(self, seconds: float) -> None:
+        self.check()
+        remaining = self.remaining()
+        if remaining is not None and seconds >= remaining:
+            # Waiting would only burn the time left; give up now
+            self.cancel(REASON_TIMEOUT)
+            raise JobCancelledError(REASON_TIMEOUT)
+
+    def sleep(self, seconds: float) -> None:
+        """time.sleep that wakes up (raising JobCancelledError) when the job is cancelled"""
+        self._check_wait(seconds)
+        if self._event.wait(seconds):
+            self.check()
+
+    async def asleep(self, seconds: float) -> None:
+        """asyncio.sleep counterpart of sleep(); the task itself is cancelled by JobQueue"""
+        self._check_wait(seconds)
+        await asyncio.sleep(seconds)
+        self.check()
+
+
+_current_token: ContextVar[Optional[CancellationToken]] = ContextVar("cancellation_token", default=None)
+
+
+def current_token() -> Optional[CancellationToken]:
+    """Token of the job running in the current context (asyncio task, or to_thread/copied context)"""
+    return _current_token.get()
+
+
+def set_current_token(token: Optional[CancellationToken]) -> None:
+    _current_token.set(token)
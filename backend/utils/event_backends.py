@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class EventBackend:
+    """Storage behind ProgressBus: stamps job events with a per-job seq and keeps them for replay"""
+
+    # True when events may come from several processes; they are then delivered by poll()
+    shared = False
+
+    def append(self, process_id: str, event: dict) -> dict:
+        """Store an event and return it with its "seq" set"""
+        raise NotImplementedError
+
+    def replay(self, process_id: str, cursor: Optional[int] = None) -> List[dict]:
+        """Stored events of a job with a seq greater than cursor, oldest first"""
+        raise NotImplementedError
+
+    def last_seq(self, process_id: str) -> int:
+        raise NotImplementedError
+
+    def finish(self, process_id: str) -> None:
+        """Called after a job's final event"""
+
+    def poll(self) -> List[Tuple[str, dict]]:
+        """Events appended (by any process) since the last poll, in append order"""
+        return []
+
+    def prune(self) -> None:
+        """Drop events past their retention period"""
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryEventBackend(EventBackend):
+    """Per-process ring buffers; the default for a single uvicorn worker"""
+
+    def __init__(self, buffer_size: int = 200, ttl_seconds: float = 600):
+        self.buffer_size = buffer_size
+        self.ttl_seconds = ttl_seconds
+        self._buffers: Dict[str, deque] = {}
+        self._sequences: Dict[str, int] = {}
+        self._finished_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def append(self, process_id: str, event: dict) -> dict:
+        with self._lock:
+            seq = self._sequences.get(process_id, 0) + 1
+            self._sequences[process_id] = seq
+            event = dict(event, seq=seq)
+            if process_id not in self._buffers:
+                self._buffers[process_id] = deque(maxlen=self.buffer_size)
+            self._buffers[process_id].append(event)
+        return event
+
+    def replay(self, process_id: str, cursor: Optional[int] = None) -> List[dict]:
+        with self._lock:
+            return [event for event in self._buffers.get(process_id, ())
+                    if cursor is None or event["seq"] > cursor]
+
+    def last_seq(self, process_id: str) -> int:
+        with self._lock:
+            return self._sequences.get(process_id, 0)
+
+    def finish(self, process_id: str) -> None:
+        with self._lock:
+            self._finished_at[process_id] = time.monotonic()
+
+    def prune(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        with self._lock:
+            for process_id, finished_at in list(self._finished_at.items()):
+                if finished_at < cutoff:
+                    del self._finished_at[process_id]
+                    self._buffers.pop(process_id, None)
+                    self._sequences.pop(process_id, None)
+
+
+class SQLiteEventBackend(EventBackend):
+    """
+    Events in a SQLite file shared by every worker process on the host.
+
+    Every process polls the table and fans out the new rows in id order, including its
+    own, so a WebSocket on any worker sees every job's events in seq order.
+
+    Reads (replay, last_seq, poll) go through a separate read-only connection: in WAL
+    mode they never wait for the write lock, so the event loop is not held up by other
+    processes' appends.
+    """
+
+    shared = True
+
+    def __init__(self, db_path: str = "output/events.db", buffer_size: int = 200, ttl_seconds: float = 600):
+        self.db_path = db_path
+        self.buffer_size = buffer_size
+        self.ttl_seconds = ttl_seconds
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    process_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    event TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_events_process_seq ON events (process_id, seq)")
+            # Last seq of each job, kept apart from the events so it never goes backwards
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sequences (
+                    process_id TEXT PRIMARY KEY,
+                    seq INTEGER NOT NULL,
+                    finished_at REAL
+                )
+            """)
+            row = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()
+        self._last_id = row[0]
+        self._read_lock = threading.Lock()
+        self._read_conn = sqlite3.connect(f"{Path(db_path).absolute().as_uri()}?mode=ro", uri=True,
+                                          check_same_thread=False, isolation_level=None)
+
+    def _read(self, sql: str, params: tuple = ()) -> list:
+        with self._read_lock:
+            return self._read_conn.execute(sql, params).fetchall()
+
+    def append(self, process_id: str, event: dict) -> dict:
+        with self._lock:
+            # BEGIN IMMEDIATE serialises writers across processes, keeping seq gapless per job
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO sequences (process_id, seq) VALUES (?, 1) "
+                    "ON CONFLICT (process_id) DO UPDATE SET seq = seq + 1",
+                    (process_id,)
+                )
+                seq = self._conn.execute(
+                    "SELECT seq FROM sequences WHERE process_id = ?", (process_id,)
+                ).fetchone()[0]
+                event = dict(event, seq=seq)
+                self._conn.execute(
+                    "INSERT INTO events (process_id, seq, event, created_at) VALUES (?, ?, ?, ?)",
+                    (process_id, seq, json.dumps(event, ensure_ascii=False), time.time())
+                )
+                # Like the memory ring buffer, keep only the last buffer_size events of a job
+                self._conn.execute(
+                    "DELETE FROM events WHERE process_id = ? AND seq <= ?", (process_id, seq - self.buffer_size)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return event
+
+    def replay(self, process_id: str, cursor: Optional[int] = None) -> List[dict]:
+        rows = self._read(
+            "SELECT event FROM events WHERE process_id = ? AND seq > ? ORDER BY seq DESC LIMIT ?",
+            (process_id, cursor or 0, self.buffer_size)
+        )
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def last_seq(self, process_id: str) -> int:
+        rows = self._read("SELECT seq FROM sequences WHERE process_id = ?", (process_id,))
+        return rows[0][0] if rows else 0
+
+    def finish(self, process_id: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE sequences SET finished_at = ? WHERE process_id = ?", (time.time(), process_id)
+            )
+
+    def poll(self) -> List[Tuple[str, dict]]:
+        # Only the sync task polls, so _last_id needs no lock of its own
+        rows = self._read(
+            "SELECT id, process_id, event FROM events WHERE id > ? ORDER BY id",
+            (self._last_id,)
+        )
+        if rows:
+            self._last_id = rows[-1][0]
+        return [(process_id, json.loads(event)) for _, process_id, event in rows]
+
+    def prune(self) -> None:
+        """Drop the events of jobs that finished more than ttl_seconds ago; running jobs are kept"""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "DELETE FROM events WHERE process_id IN "
+                    "(SELECT process_id FROM sequences WHERE finished_at < ?)",
+                    (cutoff,)
+                )
+                self._conn.execute("DELETE FROM sequences WHERE finished_at < ?", (cutoff,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+        with self._read_lock:
+            self._read_conn.close()
+
+
+def create_event_backend(kind: str, buffer_size: int, ttl_seconds: float, db_path: str = None) -> EventBackend:
+    """Event backend selected by name ("memory" or "sqlite")"""
+    if kind == "memory":
+        return MemoryEventBackend(buffer_size, ttl_seconds)
+    if kind == "sqlite":
+        return SQLiteEventBackend(db_path, buffer_size, ttl_seconds)
+    raise ValueError(f"EVENT_BACKEND desconhecido: {kind}")
@@ -0,0 +1,432 @@
+import os
+import json
+import asyncio
+import logging
+import socket
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from utils.cancellation import (CancellationToken, REASON_CANCELLED, REASON_LEASE_LOST, REASON_SHUTDOWN,
+                                REASON_TIMEOUT, set_current_token)
+
+logger = logging.getLogger(__name__)
+
+# Estados possíveis de um job
+JOB_QUEUED = "queued"
+JOB_PROCESSING = "processing"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+PENDING_STATES = (JOB_QUEUED, JOB_PROCESSING)
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has reached its maximum number of pending jobs"""
+
+
+class JobStore:
+    """
+    SQLite-backed storage for job state.
+
+    Writes share one connection behind a lock and wait for other processes' write
+    locks. Reads (get, count_pending, list_pending) use a separate read-only
+    connection, which in WAL mode never waits for writers, so request handlers on the
+    event loop are not held up by writes.
+    """
+
+    def __init__(self, db_path: str = "output/jobs.db"):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # Several worker processes may share the file; wait for their locks instead of failing
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    progress INTEGER NOT NULL DEFAULT 0,
+                    file_path TEXT NOT NULL,
+                    content_hash TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            columns = [row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+            if "content_hash" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN content_hash TEXT")
+            # Server process running the job and the last time it said so (its lease)
+            if "owner" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            if "heartbeat_at" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_content_hash ON jobs (content_hash)")
+        self._read_lock = threading.Lock()
+        self._read_conn = sqlite3.connect(f"{Path(db_path).absolute().as_uri()}?mode=ro", uri=True,
+                                          check_same_thread=False, isolation_level=None)
+        self._read_conn.row_factory = sqlite3.Row
+
+    def _row_to_dict(self, row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        if job.get("result"):
+            job["result"] = json.loads(job["result"])
+        return job
+
+    def _insert(self, job_id: str, file_path: str, content_hash: Optional[str], max_pending: Optional[int]) -> None:
+        # Must run inside a write transaction, so the capacity check and the insert are atomic
+        if max_pending is not None and self._count_pending(self._conn) >= max_pending:
+            raise QueueFullError("Fila de processamento cheia, tente novamente mais tarde")
+        now = datetime.now().isoformat()
+        self._conn.execute(
+            "INSERT INTO jobs (id, status, progress, file_path, content_hash, created_at, updated_at) "
+            "VALUES (?, ?, 0, ?, ?, ?, ?)",
+            (job_id, JOB_QUEUED, file_path, content_hash, now, now)
+        )
+
+    def create(self, job_id: str, file_path: str, content_hash: Optional[str] = None,
+               max_pending: Optional[int] = None) -> Dict[str, Any]:
+        """Create a queued job; raises QueueFullError if max_pending jobs are already pending"""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._insert(job_id, file_path, content_hash, max_pending)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._read_lock:
+            row = self._read_conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_dict(row)
+
+    def _select_by_content_hash(self, conn: sqlite3.Connection, content_hash: str) -> Optional[sqlite3.Row]:
+        states = (JOB_COMPLETED, *PENDING_STATES)
+        return conn.execute(
+            f"SELECT * FROM jobs WHERE content_hash = ? AND status IN ({','.join('?' * len(states))}) "
+            "ORDER BY created_at DESC LIMIT 1",
+            (content_hash, *states)
+        ).fetchone()
+
+    def find_by_content_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Most recent completed or still pending job for the given document hash"""
+        with self._read_lock:
+            row = self._select_by_content_hash(self._read_conn, content_hash)
+        return self._row_to_dict(row)
+
+    def find_or_create(self, job_id: str, file_path: str, content_hash: str,
+                       max_pending: Optional[int] = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        Create a job unless a completed or pending job for the same document exists.
+
+        The lookup, the max_pending check and the insert run in one write transaction
+        (BEGIN IMMEDIATE), so simultaneous uploads of a file, even in different server
+        processes, get a single job, and a full queue only rejects documents that would
+        need a new job. Returns the job and whether it was created.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._select_by_content_hash(self._conn, content_hash)
+            if row is None:
+                self._insert(job_id, file_path, content_hash, max_pending)
+        if row is not None:
+            return self._row_to_dict(row), False
+        return self.get(job_id), True
+
+    def update(self, job_id: str, **fields) -> None:
+        """Update the given columns of a job"""
+        if "result" in fields and fields["result"] is not None:
+            fields["result"] = json.dumps(fields["result"], ensure_ascii=False)
+        fields["updated_at"] = datetime.now().isoformat()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {columns} WHERE id = ?",
+                (*fields.values(), job_id)
+            )
+
+    def claim(self, job_id: str, owner: str) -> bool:
+        """Atomically move a queued job to processing; False if another worker got it first"""
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, heartbeat_at = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (JOB_PROCESSING, owner, now, now, job_id, JOB_QUEUED)
+            )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, job_id: str, owner: str) -> bool:
+        """Renew the lease of a running job; False if the job is no longer running for owner"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND owner = ? AND status = ?",
+                (datetime.now().isoformat(), job_id, owner, JOB_PROCESSING)
+            )
+        return cursor.rowcount == 1
+
+    def requeue_expired(self, lease_seconds: float) -> list:
+        """Move running jobs whose lease expired (their process died) back to queued; returns their ids"""
+        expired_before = (datetime.now() - timedelta(seconds=lease_seconds)).isoformat()
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? AND (heartbeat_at IS NULL OR heartbeat_at < ?) "
+                "ORDER BY created_at",
+                (JOB_PROCESSING, expired_before)
+            ).fetchall()
+            job_ids = [row["id"] for row in rows]
+            for job_id in job_ids:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, owner = NULL, updated_at = ? WHERE id = ?",
+                    (JOB_QUEUED, datetime.now().isoformat(), job_id)
+                )
+        return job_ids
+
+    def release(self, owner: str) -> list:
+        """Move the running jobs of owner back to queued, e.g. when it shuts down; returns their ids"""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? AND owner = ?", (JOB_PROCESSING, owner)
+            ).fetchall()
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, updated_at = ? WHERE status = ? AND owner = ?",
+                (JOB_QUEUED, datetime.now().isoformat(), JOB_PROCESSING, owner)
+            )
+        return [row["id"] for row in rows]
+
+    def cancel(self, job_id: str, error: str = REASON_CANCELLED, status: str = JOB_CANCELLED) -> bool:
+        """Atomically end a queued or running job; False if it had already finished"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+                f"WHERE id = ? AND status IN ({','.join('?' * len(PENDING_STATES))})",
+                (status, error, datetime.now().isoformat(), job_id, *PENDING_STATES)
+            )
+        return cursor.rowcount == 1
+
+    def _count_pending(self, conn: sqlite3.Connection) -> int:
+        row = conn.execute(
+            f"SELECT COUNT(*) FROM jobs WHERE status IN ({','.join('?' * len(PENDING_STATES))})",
+            PENDING_STATES
+        ).fetchone()
+        return row[0]
+
+    def count_pending(self) -> int:
+        with self._read_lock:
+            return self._count_pending(self._read_conn)
+
+    def list_pending(self) -> list:
+        """Jobs that were queued or running, oldest first"""
+        with self._read_lock:
+            rows = self._read_conn.execute(
+                f"SELECT * FROM jobs WHERE status IN ({','.join('?' * len(PENDING_STATES))}) "
+                "ORDER BY created_at",
+                PENDING_STATES
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+        with self._read_lock:
+            self._read_conn.close()
+
+
+class JobQueue:
+    """
+    Bounded job queue processed by a fixed pool of asyncio workers.
+
+    Each running job gets a CancellationToken, passed to the handler and set as the
+    current token of the job's task. A watchdog cancels the token and the task once the
+    job runs past timeout_seconds or is cancelled with cancel() (from any server process
+    sharing the store), so coroutines stop at once and worker threads at their next check.
+
+    Running jobs hold a lease in the store, renewed every lease_seconds / 3 while the job
+    runs. Several server processes can share the store: a process only takes over (at
+    startup and then periodically) running jobs whose lease expired, i.e. whose process
+    died, and hands its own running jobs back to the queue when it stops.
+    """
+
+    def __init__(self, store: JobStore, handler: Callable[[str, str, CancellationToken], Awaitable[Any]],
+                 workers: int = 2, max_pending: int = 50, lease_seconds: float = 60,
+                 timeout_seconds: float = 0, check_interval: float = 1.0):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.timeout_seconds = timeout_seconds
+        self.check_interval = check_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list = []
+        self._running: Dict[str, Tuple[CancellationToken, asyncio.Task]] = {}
+        self._stopping = False
+
+    async def start(self) -> None:
+        """Start the worker pool and re-enqueue jobs left over from a previous run"""
+        self._queue = asyncio.Queue()
+        self._requeue_expired()
+        for job in self.store.list_pending():
+            if job["status"] == JOB_QUEUED:
+                logger.info(f"Re-enqueuing job {job['id']}")
+                self._queue.put_nowait(job["id"])
+        self._stopping = False
+        self._tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._watchdog()))
+        logger.info(f"Job queue started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        self._stopping = True
+        # Also stops the worker threads still running for those jobs
+        for token, _ in self._running.values():
+            token.cancel(REASON_SHUTDOWN)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Interrupted jobs go back to the queue, for this or another server process
+        for job_id in self.store.release(self.owner):
+            logger.info(f"Released job {job_id}")
+
+    def _requeue_expired(self) -> None:
+        for job_id in self.store.requeue_expired(self.lease_seconds):
+            logger.info(f"Taking over job {job_id}, its lease expired")
+            self._queue.put_nowait(job_id)
+
+    def submit(self, job_id: str, file_path: str, content_hash: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        Persist a new job and enqueue it, rejecting it if the queue is full. With a
+        content_hash, a completed or pending job for the same document is returned
+        instead of creating a new one, even when the queue is full; the flag tells
+        whether the job was created.
+        """
+        if content_hash is None:
+            job, created = self.store.create(job_id, file_path, max_pending=self.max_pending), True
+        else:
+            job, created = self.store.find_or_create(job_id, file_path, content_hash, max_pending=self.max_pending)
+        if created:
+            self._queue.put_nowait(job_id)
+        return job, created
+
+    def cancel(self, job_id: str, reason: str = REASON_CANCELLED) -> bool:
+        """Cancel a queued or running job; False if it had already finished"""
+        if not self.store.cancel(job_id, error=reason):
+            return False
+        # Jobs running in another server process are stopped by that process's watchdog
+        self._abort(job_id, reason)
+        return True
+
+    def _abort(self, job_id: str, reason: str) -> None:
+        running = self._running.get(job_id)
+        if running is None:
+            return
+        token, task = running
+        logger.warning(f"Stopping job {job_id}: {reason}")
+        token.cancel(reason)
+        task.cancel()
+
+    async def _watchdog(self) -> None:
+        """
+        Enforce job deadlines, pick up cancellations made by other processes and take
+        over jobs whose lease expired
+        """
+        loop = asyncio.get_running_loop()
+        next_recovery = loop.time() + self.lease_seconds
+        while True:
+            await asyncio.sleep(self.check_interval)
+            if loop.time() >= next_recovery:
+                next_recovery = loop.time() + self.lease_seconds
+                try:
+                    self._requeue_expired()
+                except Exception as e:
+                    logger.error(f"Job recovery failed: {str(e)}")
+            for job_id, (token, _) in list(self._running.items()):
+                try:
+                    if token.expired:
+                        self.store.cancel(job_id, error=REASON_TIMEOUT, status=JOB_FAILED)
+                        self._abort(job_id, REASON_TIMEOUT)
+                        continue
+                    job = self.store.get(job_id)
+                    if job is not None and job["status"] == JOB_CANCELLED:
+                        self._abort(job_id, job["error"] or REASON_CANCELLED)
+                except Exception as e:
+                    logger.error(f"Job watchdog failed for {job_id}: {str(e)}")
+
+    def _record_stopped(self, job_id: str, token: CancellationToken) -> None:
+        # cancel() records the final state itself; the job may hit its deadline before
+        # the watchdog notices it
+        if token.reason in (None, REASON_TIMEOUT):
+            self.store.cancel(job_id, error=REASON_TIMEOUT, status=JOB_FAILED)
+        logger.info(f"Job {job_id} stopped: {token.reason or REASON_TIMEOUT}")
+
+    async def _run(self, job_id: str, file_path: str, token: CancellationToken) -> Any:
+        # The task runs in its own copy of the context, so API calls made from it (and
+        # from the threads it hands work to) find the job's token
+        set_current_token(token)
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            return await self.handler(job_id, file_path, token)
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str) -> None:
+        """Keep renewing the job's lease so no other server process takes it over"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await asyncio.to_thread(self.store.heartbeat, job_id, self.owner)
+            except Exception as e:
+                logger.error(f"Heartbeat failed for job {job_id}: {str(e)}")
+                continue
+            if not renewed:
+                job = await asyncio.to_thread(self.store.get, job_id)
+                if job is not None and job["status"] in PENDING_STATES:
+                    # The lease expired (e.g. the loop was blocked) and another process took it over
+                    self._abort(job_id, REASON_LEASE_LOST)
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            token = None
+            try:
+                job = self.store.get(job_id)
+                if job is None or not self.store.claim(job_id, self.owner):
+                    continue
+                logger.info(f"Worker {worker_id} picked up job {job_id}")
+                token = CancellationToken(self.timeout_seconds)
+                task = asyncio.create_task(self._run(job_id, job["file_path"], token))
+                self._running[job_id] = (token, task)
+                try:
+                    result = await task
+                finally:
+                    self._running.pop(job_id, None)
+                if token.reason is not None:
+                    # Finished just as it was cancelled; the store already has the final state
+                    continue
+                self.store.update(job_id, status=JOB_COMPLETED, progress=100, result=result)
+            except asyncio.CancelledError:
+                if self._stopping or token is None or not token.cancelled:
+                    raise
+                self._record_stopped(job_id, token)
+            except Exception as e:
+                # JobCancelledError, or whatever the handler raised while being stopped
+                if token is not None and token.cancelled:
+                    self._record_stopped(job_id, token)
+                    continue
+                logger.error(f"Job {job_id} failed: {str(e)}")
+                self.store.update(job_id, status=JOB_FAILED, error=str(e))
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,229 @@
+import time
+import queue
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional, Set
+from utils.event_backends import EventBackend, MemoryEventBackend
+
+logger = logging.getLogger(__name__)
+
+# Eventos que encerram um job; os eventos guardados do job expiram algum tempo depois deles
+FINAL_EVENT_TYPES = ("complete", "error", "cancelled")
+
+
+class Subscription:
+    """A subscriber's bounded event queue; get() returns None once the subscriber was dropped"""
+
+    def __init__(self, process_id: str, max_queue: int):
+        self.process_id = process_id
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = False
+        self.last_seq = 0
+
+    def offer(self, event: dict) -> bool:
+        """Queue an event without blocking; False if the subscriber is too slow"""
+        if self.dropped:
+            return False
+        # An event may arrive both from the replay and live; deliver it once
+        if event["seq"] <= self.last_seq:
+            return True
+        try:
+            self.queue.put_nowait(event)
+            self.last_seq = event["seq"]
+            return True
+        except asyncio.QueueFull:
+            # Discard the backlog and leave room for the end-of-stream marker
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+
+    async def get(self) -> Optional[dict]:
+        return await self.queue.get()
+
+
+class ProgressBus:
+    """
+    Delivers per-job events from any thread to subscribers on the server event loop.
+
+    publish() is safe to call from worker threads: events are handed to the loop with
+    call_soon_threadsafe. "progress" events are coalesced so that each job emits at most
+    max_messages_per_second of them (the latest value wins); any other event first
+    flushes the pending progress, so ordering is preserved.
+
+    Every delivered event is stamped with a per-job sequence number ("seq") and stored
+    by the EventBackend, so a subscriber that connects late or reconnects can replay
+    what it missed from a cursor. Subscribers have bounded queues and are dropped when
+    they fall behind.
+
+    Storing events and running listeners may block (SQLite writes, job store updates),
+    so both happen in order on a single writer thread, never on the event loop; the
+    stored events are then handed back to the loop for fan-out.
+
+    With a shared backend (e.g. SQLiteEventBackend) several worker processes can serve
+    the same jobs: each process polls the backend every poll_interval seconds and fans
+    out the new events, its own included, so they reach subscribers in seq order.
+    Listeners only run in the publishing process, on its writer thread.
+    """
+
+    def __init__(self, max_messages_per_second: float = 5, max_queue: int = 100,
+                 backend: Optional[EventBackend] = None, poll_interval: float = 0.2,
+                 prune_interval: float = 60):
+        self.min_interval = 1.0 / max_messages_per_second if max_messages_per_second > 0 else 0.0
+        self.max_queue = max_queue
+        self.backend = backend if backend is not None else MemoryEventBackend()
+        self.poll_interval = poll_interval
+        self.prune_interval = prune_interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._sync_task: Optional[asyncio.Task] = None
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._listeners: list = []
+        self._pending: Dict[str, dict] = {}
+        self._last_sent: Dict[str, float] = {}
+        self._flush_handles: Dict[str, asyncio.TimerHandle] = {}
+        self._writes: queue.Queue = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Attach the bus to the server loop; must be called from that loop's thread"""
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+        self._sync_task = loop.create_task(self._sync())
+        self._writer = threading.Thread(target=self._write_events, name="progress-bus-writer", daemon=True)
+        self._writer.start()
+
+    async def close(self) -> None:
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            await asyncio.gather(self._sync_task, return_exceptions=True)
+            self._sync_task = None
+        if self._writer is not None:
+            # Events already queued are still stored before the writer stops
+            self._writes.put(None)
+            await asyncio.to_thread(self._writer.join)
+            self._writer = None
+        self.backend.close()
+
+    async def _sync(self) -> None:
+        """Fan out events from a shared backend and prune expired ones"""
+        last_prune = time.monotonic()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                if self.backend.shared:
+                    for process_id, event in await asyncio.to_thread(self.backend.poll):
+                        self._fan_out(process_id, event)
+                if time.monotonic() - last_prune >= self.prune_interval:
+                    await asyncio.to_thread(self.backend.prune)
+                    last_prune = time.monotonic()
+            except Exception as e:
+                logger.error(f"Progress bus sync failed: {str(e)}")
+
+    def add_listener(self, listener: Callable[[str, dict], Any]) -> None:
+        """Call listener(process_id, event) on the writer thread for every delivered event"""
+        self._listeners.append(listener)
+
+    def subscribe(self, process_id: str, cursor: Optional[int] = None) -> Subscription:
+        """
+        Subscribe to a job's events. Buffered events with a seq greater than cursor (all
+        buffered events if cursor is None) are replayed first; must run on the loop.
+
+        The replay is read on the loop so that no event can be fanned out between the
+        read and the registration; reads do not wait for writers (SQLite runs in WAL mode).
+        """
+        replay = self.backend.replay(process_id, cursor)
+        # The replayed backlog does not count against the live-event bound
+        subscription = Subscription(process_id, self.max_queue + len(replay))
+        for event in replay:
+            subscription.offer(event)
+        self._subscribers[process_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.process_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.process_id]
+
+    def last_seq(self, process_id: str) -> int:
+        return self.backend.last_seq(process_id)
+
+    def publish(self, process_id: str, event: dict) -> None:
+        """Publish an event for a job; may be called from any thread"""
+        if self._loop is None:
+            logger.warning(f"Progress bus not bound to a loop, dropping event for {process_id}")
+            return
+        if threading.get_ident() == self._loop_thread:
+            self._dispatch(process_id, event)
+        else:
+            self._loop.call_soon_threadsafe(self._dispatch, process_id, event)
+
+    def _dispatch(self, process_id: str, event: dict) -> None:
+        if event.get("type") == "progress":
+            self._pending[process_id] = event
+            wait = self._last_sent.get(process_id, 0.0) + self.min_interval - time.monotonic()
+            if wait <= 0:
+                self._flush(process_id)
+            elif process_id not in self._flush_handles:
+                self._flush_handles[process_id] = self._loop.call_later(wait, self._flush, process_id)
+            return
+
+        self._flush(process_id)
+        final = event.get("type") in FINAL_EVENT_TYPES
+        self._deliver(process_id, event, final)
+        if final:
+            self._last_sent.pop(process_id, None)
+
+    def _flush(self, process_id: str) -> None:
+        handle = self._flush_handles.pop(process_id, None)
+        if handle is not None:
+            handle.cancel()
+        event = self._pending.pop(process_id, None)
+        if event is None:
+            return
+        self._last_sent[process_id] = time.monotonic()
+        self._deliver(process_id, event)
+
+    def _deliver(self, process_id: str, event: dict, final: bool = False) -> None:
+        self._writes.put((process_id, event, final))
+
+    def _write_events(self) -> None:
+        """Writer thread: store events, run listeners and hand the events back to the loop"""
+        while True:
+            item = self._writes.get()
+            if item is None:
+                return
+            process_id, event, final = item
+            try:
+                event = self.backend.append(process_id, event)
+            except Exception as e:
+                logger.error(f"Failed to store event for {process_id}: {str(e)}")
+                continue
+            for listener in self._listeners:
+                try:
+                    listener(process_id, event)
+                except Exception as e:
+                    logger.error(f"Progress listener failed for {process_id}: {str(e)}")
+            if final:
+                try:
+                    self.backend.finish(process_id)
+                except Exception as e:
+                    logger.error(f"Failed to finish events of {process_id}: {str(e)}")
+            # Shared backends deliver through _sync, keeping the order across processes
+            if not self.backend.shared:
+                try:
+                    self._loop.call_soon_threadsafe(self._fan_out, process_id, event)
+                except RuntimeError:
+                    return  # The loop is closed; nobody is listening anymore
+
+    def _fan_out(self, process_id: str, event: dict) -> None:
+        for subscription in list(self._subscribers.get(process_id, ())):
+            if not subscription.offer(event):
+                logger.warning(f"Dropping slow subscriber of {process_id}")
+                self.unsubscribe(subscription)
@@ -0,0 +1,193 @@
+import ssl
+import time
+import socket
+import random
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+import httpx
+import httplib2
+from config import Config
+from utils.cancellation import CancellationToken, current_token
+
+logger = logging.getLogger(__name__)
+
+# HTTP status codes that are worth retrying after a pause
+RETRYABLE_STATUS_CODES = (429, 500, 503)
+
+# Network failures (dropped connections, timeouts, TLS errors) are retried like a 5xx
+TRANSPORT_ERRORS = (ConnectionError, socket.timeout, ssl.SSLError, httplib2.HttpLib2Error, httpx.TransportError)
+
+
+class TokenBucket:
+    """Thread-safe token bucket usable from both threads and coroutines"""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """Take tokens (possibly going into debt) and return how long the caller must wait"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+
+    def acquire(self, tokens: float = 1, cancellation: Optional[CancellationToken] = None) -> None:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            if cancellation:
+                cancellation.sleep(wait)
+            else:
+                time.sleep(wait)
+
+    async def acquire_async(self, tokens: float = 1, cancellation: Optional[CancellationToken] = None) -> None:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            if cancellation:
+                await cancellation.asleep(wait)
+            else:
+                await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller of this bucket for the given time, e.g. after a 429"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = min(self._tokens, 0)
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str) -> TokenBucket:
+    """Process-wide limiter for an API ('slides', 'drive' or 'mistral') configured from Config"""
+    with _limiters_lock:
+        if name not in _limiters:
+            per_minute, burst = Config.RATE_LIMITS[name]
+            _limiters[name] = TokenBucket(rate_per_second=per_minute / 60.0, capacity=burst)
+        return _limiters[name]
+
+
+def get_status_code(error: Exception) -> Optional[int]:
+    """HTTP status of a Google API, Mistral or httpx error, if any"""
+    status = getattr(error, "status_code", None)
+    if status is None and getattr(error, "resp", None) is not None:
+        status = getattr(error.resp, "status", None)
+    if status is None and getattr(error, "response", None) is not None:
+        status = getattr(error.response, "status_code", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """Value of the Retry-After header (in seconds) of an error response, if present"""
+    headers = None
+    if getattr(error, "resp", None) is not None:
+        headers = error.resp  # httplib2.Response is a dict of lowercase headers
+    elif getattr(error, "raw_response", None) is not None:
+        headers = error.raw_response.headers
+    elif getattr(error, "response", None) is not None:
+        headers = getattr(error.response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception, retry_transport_errors: bool = True) -> bool:
+    if isinstance(error, TRANSPORT_ERRORS):
+        return retry_transport_errors
+    return get_status_code(error) in RETRYABLE_STATUS_CODES
+
+
+def _describe(error: Exception) -> str:
+    status = get_status_code(error)
+    return f"HTTP {status}" if status is not None else type(error).__name__
+
+
+def _backoff_delay(error: Exception, attempt: int, base_delay: float, max_delay: float) -> float:
+    retry_after = get_retry_after(error)
+    if retry_after is not None:
+        return min(retry_after, max_delay)
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def call_with_backoff(fn: Callable[[], Any], limiter: Optional[TokenBucket] = None,
+                      max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0,
+                      cancellation: Optional[CancellationToken] = None,
+                      retry_transport_errors: bool = True) -> Any:
+    """
+    Call fn through the limiter, retrying on 429/5xx and transport errors with
+    exponential backoff.
+
+    A request that timed out or lost its connection may still have been carried out by
+    the server; pass retry_transport_errors=False when sending it twice is not safe
+    (e.g. a POST that creates a file), so only 429/5xx responses are retried.
+
+    Stops with JobCancelledError before any attempt or wait once the job's cancellation
+    token (by default the one of the current context) is cancelled or past its deadline.
+    """
+    cancellation = cancellation or current_token()
+    attempt = 0
+    while True:
+        if cancellation:
+            cancellation.check()
+        if limiter:
+            limiter.acquire(cancellation=cancellation)
+        try:
+            return fn()
+        except Exception as e:
+            if not is_retryable(e, retry_transport_errors) or attempt >= max_retries:
+                raise
+            delay = _backoff_delay(e, attempt, base_delay, max_delay)
+            logger.warning(f"{_describe(e)}, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+            if limiter and get_status_code(e) == 429:
+                limiter.pause(delay)
+            elif cancellation:
+                cancellation.sleep(delay)
+            else:
+                time.sleep(delay)
+            attempt += 1
+
+
+async def acall_with_backoff(fn: Callable[[], Awaitable[Any]], limiter: Optional[TokenBucket] = None,
+                             max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0,
+                             cancellation: Optional[CancellationToken] = None,
+                             retry_transport_errors: bool = True) -> Any:
+    """Async version of call_with_backoff; fn must return a new awaitable on each call"""
+    cancellation = cancellation or current_token()
+    attempt = 0
+    while True:
+        if cancellation:
+            cancellation.check()
+        if limiter:
+            await limiter.acquire_async(cancellation=cancellation)
+        try:
+            return await fn()
+        except Exception as e:
+            if not is_retryable(e, retry_transport_errors) or attempt >= max_retries:
+                raise
+            delay = _backoff_delay(e, attempt, base_delay, max_delay)
+            logger.warning(f"{_describe(e)}, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+            if limiter and get_status_code(e) == 429:
+                limiter.pause(delay)
+            elif cancellation:
+                await cancellation.asleep(delay)
+            else:
+                await asyncio.sleep(delay)
+            attempt += 1
@@ -0,0 +1,132 @@
+import time
+import logging
+import threading
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateCopyPool:
+    """
+    Pool of pre-made copies of the slides template, already shared by link.
+
+    A daemon thread keeps `size` copies ready and periodically checks the template's
+    Drive version; when the template changes, the copies made from the old version
+    are deleted and the pool is refilled.
+
+    Each copy is tagged with the template version it was made from, and acquire()
+    only hands out copies of the current version (looked up at most once every
+    version_ttl_seconds), so an edited template is picked up before the next periodic
+    check. Mismatched copies are deleted by the pool thread.
+    """
+
+    def __init__(self, slides_client, size: int, check_interval_seconds: float = 60,
+                 version_ttl_seconds: float = 5):
+        self.slides_client = slides_client
+        self.size = size
+        self.check_interval_seconds = check_interval_seconds
+        self.version_ttl_seconds = version_ttl_seconds
+        self._copies: Deque[Tuple[str, str]] = deque()  # (presentation_id, template version)
+        self._discarded: List[str] = []
+        self._version: Optional[str] = None
+        self._version_checked_at = 0.0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="template-copy-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop refilling and delete the copies that were never handed out"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+        with self._lock:
+            leftovers = [presentation_id for presentation_id, _ in self._copies] + self._discarded
+            self._copies.clear()
+            self._discarded = []
+        for presentation_id in leftovers:
+            self.slides_client.delete_presentation(presentation_id)
+
+    def acquire(self) -> Optional[str]:
+        """A ready copy of the current template, or None if the pool has none"""
+        try:
+            version = self._current_version()
+        except Exception as e:
+            # Without the version a copy could be stale; the caller makes a fresh one
+            logger.error(f"Could not check the template version: {str(e)}")
+            return None
+        presentation_id = None
+        with self._lock:
+            while self._copies:
+                candidate, copy_version = self._copies.popleft()
+                if copy_version == version:
+                    presentation_id = candidate
+                    break
+                self._discarded.append(candidate)
+        self._wakeup.set()
+        return presentation_id
+
+    def available(self) -> int:
+        with self._lock:
+            return len(self._copies)
+
+    def _current_version(self, force: bool = False) -> str:
+        """Template version, looked up again once the cached one is version_ttl_seconds old"""
+        with self._lock:
+            if not force and self._version is not None and \
+                    time.monotonic() - self._version_checked_at < self.version_ttl_seconds:
+                return self._version
+        version = self.slides_client.get_template_version()
+        with self._lock:
+            if version != self._version and self._version is not None:
+                logger.info(f"Template changed (version {version}), discarding pooled copies of older versions")
+            self._version = version
+            self._version_checked_at = time.monotonic()
+            # Copies of other versions are never handed out; delete them now
+            self._discarded.extend(presentation_id for presentation_id, copy_version in self._copies
+                                   if copy_version != version)
+            self._copies = deque(copy for copy in self._copies if copy[1] == version)
+        return version
+
+    def _run(self) -> None:
+        next_check = 0.0
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() >= next_check:
+                    # Scheduled before the lookup, so a failing lookup is retried at the
+                    # normal interval instead of in a busy loop
+                    next_check = time.monotonic() + self.check_interval_seconds
+                    self._current_version(force=True)
+                self._delete_discarded()
+                self._refill()
+            except Exception as e:
+                logger.error(f"Template copy pool refill failed: {str(e)}")
+            self._wakeup.wait(max(0.0, next_check - time.monotonic()))
+            self._wakeup.clear()
+
+    def _delete_discarded(self) -> None:
+        with self._lock:
+            discarded, self._discarded = self._discarded, []
+        for presentation_id in discarded:
+            self.slides_client.delete_presentation(presentation_id)
+
+    def _refill(self) -> None:
+        while not self._stop.is_set() and self.available() < self.size:
+            # Tag the copy with the version known before copying: if the template changes
+            # meanwhile, the copy is seen as stale rather than as current
+            version = self._current_version()
+            presentation_id = self.slides_client.copy_template()
+            with self._lock:
+                self._copies.append((presentation_id, version))
+            logger.debug(f"Pooled template copy {presentation_id} (version {version})")
@@ -0,0 +1,112 @@
+import os
+import hashlib
+import logging
+import tempfile
+from typing import Iterable, Tuple
+from fastapi import UploadFile, HTTPException
+from fastapi.responses import JSONResponse
+from pdf_processor import PDFProcessor
+
+logger = logging.getLogger(__name__)
+
+# Room for the multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class InvalidUploadError(Exception):
+    """Raised when an upload is not a PDF or exceeds the size limit"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+async def stream_upload_to_disk(file: UploadFile, dest_dir: str, max_bytes: int,
+                                chunk_size: int = 1024 * 1024) -> Tuple[str, str, int]:
+    """
+    Stream an upload to a temporary file in fixed-size chunks, hashing it on the way.
+
+    Returns the temporary path, the SHA-256 hex digest and the size in bytes.
+    The caller is responsible for moving or removing the temporary file.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise InvalidUploadError(f"Arquivo excede o tamanho máximo de {max_bytes} bytes", 413)
+
+    os.makedirs(dest_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=dest_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                if size == 0 and not PDFProcessor.has_pdf_header(chunk):
+                    raise InvalidUploadError("Arquivo enviado não é um PDF válido", 400)
+                size += len(chunk)
+                if size > max_bytes:
+                    raise InvalidUploadError(f"Arquivo excede o tamanho máximo de {max_bytes} bytes", 413)
+                digest.update(chunk)
+                f.write(chunk)
+        if size == 0:
+            raise InvalidUploadError("Arquivo enviado está vazio", 400)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+    return tmp_path, digest.hexdigest(), size
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject request bodies larger than max_bytes on the given paths before they are read.
+
+    A FastAPI UploadFile parameter makes Starlette receive and spool the whole multipart
+    body before the endpoint runs, so the limit has to be enforced here: a declared
+    Content-Length over the limit gets a 413 without reading the body, and chunked
+    bodies get a 413 as soon as the received bytes cross it.
+    """
+
+    def __init__(self, app, max_bytes: int, paths: Iterable[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = set(paths)
+
+    def _too_large(self) -> str:
+        return f"Arquivo excede o tamanho máximo de {self.max_bytes - MULTIPART_OVERHEAD_BYTES} bytes"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            logger.warning(f"Rejecting upload of {int(content_length)} bytes before reading it")
+            response = JSONResponse({"detail": self._too_large()}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised inside the body parsing, so FastAPI answers with this 413
+                    raise HTTPException(413, self._too_large())
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def commit_upload(tmp_path: str, dest_path: str) -> str:
+    """Atomically move a streamed upload to its content-addressed path"""
+    if os.path.exists(dest_path):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, dest_path)
+    return dest_path